@@ -7,7 +7,7 @@ A modular email client with support for multiple accounts, caching, and search f
 from .main import MailClient
 from .widgets import MailTab
 from .dialogs import AccountDialog, SettingsDialog, EmailSearchDialog
-from .workers import IMAPWorker, FileIOWorker, FolderWorker
+from .workers import IMAPWorker, MultiFolderWorker, FileIOWorker, FolderWorker
 from .utils import load_svg_icon, get_status_circle
 
 __version__ = "1.0.0"
@@ -20,6 +20,7 @@ __all__ = [
     "SettingsDialog",
     "EmailSearchDialog",
     "IMAPWorker",
+    "MultiFolderWorker",
     "FileIOWorker",
     "FolderWorker",
     "load_svg_icon",
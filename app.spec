@@ -2,11 +2,11 @@
 
 
 a = Analysis(
-    ['mailtime_app.py', 'utils.py', 'workers.py', 'dialogs.py', 'widgets.py'],
+    ['mailtime_app.py', 'utils.py', 'workers.py', 'dialogs.py', 'widgets.py', 'email_cache.py'],
     pathex=['.'],
     binaries=[],
     datas=[('assets/icon.png', '.'), ('assets/mail.mp3', '.'), ('assets/fontawesome_icons', 'fontawesome_icons')],
-    hiddenimports=['aioimaplib', 'email', 'json', 'hashlib', 'PyQt6.QtSvg'],
+    hiddenimports=['aioimaplib', 'email', 'json', 'hashlib', 'PyQt6.QtSvg', 'sqlite3'],
     hookspath=[],
     hooksconfig={},
     runtime_hooks=[],
@@ -12,27 +12,29 @@ from utils import load_svg_icon
 log = logging.getLogger('MailClient')
 
 
+# Known providers, keyed by lowercased domain
+_PROVIDER_SETTINGS = {
+    'gmail.com': {"host": "imap.gmail.com", "port": 993, "use_ssl": True},
+    'googlemail.com': {"host": "imap.gmail.com", "port": 993, "use_ssl": True},
+    'outlook.com': {"host": "outlook.office365.com", "port": 993, "use_ssl": True},
+    'hotmail.com': {"host": "outlook.office365.com", "port": 993, "use_ssl": True},
+    'live.com': {"host": "outlook.office365.com", "port": 993, "use_ssl": True},
+    'yahoo.com': {"host": "imap.mail.yahoo.com", "port": 993, "use_ssl": True},
+    'icloud.com': {"host": "imap.mail.me.com", "port": 993, "use_ssl": True},
+    'me.com': {"host": "imap.mail.me.com", "port": 993, "use_ssl": True},
+    'aol.com': {"host": "imap.aol.com", "port": 993, "use_ssl": True},
+}
+
+
 def get_imap_settings_for_domain(email: str) -> Dict:
     """Auto-detect IMAP settings based on email domain"""
     if not email or '@' not in email:
         return {"host": "", "port": 993, "use_ssl": True}
 
-    domain = email.split('@')[1].lower()
-
-    provider_settings = {
-        'gmail.com': {"host": "imap.gmail.com", "port": 993, "use_ssl": True},
-        'googlemail.com': {"host": "imap.gmail.com", "port": 993, "use_ssl": True},
-        'outlook.com': {"host": "outlook.office365.com", "port": 993, "use_ssl": True},
-        'hotmail.com': {"host": "outlook.office365.com", "port": 993, "use_ssl": True},
-        'live.com': {"host": "outlook.office365.com", "port": 993, "use_ssl": True},
-        'yahoo.com': {"host": "imap.mail.yahoo.com", "port": 993, "use_ssl": True},
-        'icloud.com': {"host": "imap.mail.me.com", "port": 993, "use_ssl": True},
-        'me.com': {"host": "imap.mail.me.com", "port": 993, "use_ssl": True},
-        'aol.com': {"host": "imap.aol.com", "port": 993, "use_ssl": True},
-    }
-
-    if domain in provider_settings:
-        return provider_settings[domain]
+    domain = email.rpartition('@')[2].lower()
+
+    if domain in _PROVIDER_SETTINGS:
+        return dict(_PROVIDER_SETTINGS[domain])
 
     return {"host": f"imap.{domain}", "port": 993, "use_ssl": True}
 
@@ -0,0 +1,216 @@
+import logging
+import sqlite3
+from contextlib import closing
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List, Optional
+
+log = logging.getLogger('MailClient')
+
+CACHE_SUFFIXES = ('', '-wal', '-shm')
+
+# Version 1 keys emails by IMAP UID (version 0 used sequence numbers, which shift on every expunge);
+# version 2 adds a numeric timestamp used for sorting; version 3 keys emails on (folder, id), as UIDs are
+# only unique within a folder
+SCHEMA_VERSION = 3
+
+_SCHEMA = """
+    CREATE TABLE IF NOT EXISTS emails (
+        id TEXT NOT NULL,
+        account TEXT,
+        folder TEXT NOT NULL,
+        subject TEXT NOT NULL,
+        from_addr TEXT NOT NULL,
+        date TEXT,
+        body_text TEXT,
+        body_html TEXT,
+        timestamp INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (folder, id)
+    )
+"""
+
+_UID_MARKS_SCHEMA = """
+    CREATE TABLE IF NOT EXISTS uid_marks (
+        folder TEXT PRIMARY KEY,
+        uidvalidity INTEGER NOT NULL,
+        last_uid INTEGER NOT NULL
+    )
+"""
+
+_INSERT = "INSERT OR IGNORE INTO emails VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)"
+_SAVE_UID_MARK = "INSERT OR REPLACE INTO uid_marks VALUES (?, ?, ?)"
+
+
+def connect(cache_file) -> sqlite3.Connection:
+    """Open the per-account cache database in WAL mode"""
+    conn = sqlite3.connect(str(cache_file))
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    version = conn.execute("PRAGMA user_version").fetchone()[0]
+    if version < SCHEMA_VERSION:
+        with conn:
+            if version < 1:
+                # Emails cached under sequence numbers can't be matched to UIDs; drop them so the next sync refetches
+                conn.execute("DROP TABLE IF EXISTS emails")
+            else:
+                if version < 2:
+                    conn.execute("ALTER TABLE emails ADD COLUMN timestamp INTEGER NOT NULL DEFAULT 0")
+                    _backfill_timestamps(conn)
+                if version < 3:
+                    _rekey_by_folder(conn)
+            conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+    conn.execute(_SCHEMA)
+    conn.execute(_UID_MARKS_SCHEMA)
+    return conn
+
+
+def _backfill_timestamps(conn: sqlite3.Connection):
+    """Derive timestamps for rows cached before the column existed from their display dates"""
+    updates = []
+    for rowid, date in conn.execute("SELECT rowid, date FROM emails").fetchall():
+        try:
+            # Display dates are in the sender's zone without an offset; UTC is close enough for ordering
+            timestamp = int(datetime.strptime(date, "%Y-%m-%d %H:%M").replace(tzinfo=timezone.utc).timestamp())
+        except (TypeError, ValueError):
+            continue
+        updates.append((timestamp, rowid))
+    conn.executemany("UPDATE emails SET timestamp = ? WHERE rowid = ?", updates)
+
+
+def _rekey_by_folder(conn: sqlite3.Connection):
+    """Rebuild the emails table under the (folder, id) primary key, keeping rows in insertion order"""
+    conn.execute("ALTER TABLE emails RENAME TO emails_old")
+    conn.execute(_SCHEMA)
+    conn.execute(
+        "INSERT OR IGNORE INTO emails SELECT id, account, COALESCE(folder, 'INBOX'), subject, from_addr, date, "
+        "body_text, body_html, timestamp FROM emails_old ORDER BY rowid"
+    )
+    conn.execute("DROP TABLE emails_old")
+
+
+def _to_row(account: str, email_data: Dict) -> tuple:
+    return (
+        email_data.get('id', ''),
+        account,
+        email_data.get('folder', 'INBOX'),
+        email_data.get('subject', ''),
+        email_data.get('from', ''),
+        email_data.get('date', ''),
+        email_data.get('body_text', ''),
+        email_data.get('body_html', ''),
+        email_data.get('timestamp', 0),
+    )
+
+
+def _remove_json_cache(cache_file: Path):
+    """Remove a legacy *_emails.json cache; it is keyed by sequence numbers and can't be migrated"""
+    legacy_file = cache_file.with_suffix('.json')
+    if not legacy_file.exists():
+        return
+
+    try:
+        legacy_file.unlink()
+        log.info(f"Removed legacy JSON cache {legacy_file.name}")
+    except Exception as e:
+        log.warning(f"Could not remove legacy cache {legacy_file.name}: {e}")
+
+
+def _save_uid_marks(conn: sqlite3.Connection, uid_marks: Optional[Dict[str, List[int]]]):
+    if uid_marks:
+        conn.executemany(_SAVE_UID_MARK, [(folder, uidvalidity, last_uid)
+                                          for folder, (uidvalidity, last_uid) in uid_marks.items()])
+
+
+def load_emails(cache_file) -> List[Dict]:
+    """Load all cached emails in insertion order, without their HTML bodies"""
+    cache_file = Path(cache_file)
+    _remove_json_cache(cache_file)
+    if not cache_file.exists():
+        return []
+
+    with closing(connect(cache_file)) as conn:
+        rows = conn.execute(
+            "SELECT id, folder, subject, from_addr, date, body_text, timestamp FROM emails ORDER BY rowid"
+        ).fetchall()
+
+    return [
+        {
+            "id": email_id,
+            "folder": folder,
+            "subject": subject,
+            "from": from_addr,
+            "date": date,
+            "body_text": body_text,
+            "timestamp": timestamp
+        }
+        for email_id, folder, subject, from_addr, date, body_text, timestamp in rows
+    ]
+
+
+def load_body_html(cache_file, folder: str, email_id: str) -> str:
+    """Load the HTML body of a single cached email"""
+    cache_file = Path(cache_file)
+    if not cache_file.exists():
+        return ""
+
+    with closing(connect(cache_file)) as conn:
+        row = conn.execute(
+            "SELECT body_html FROM emails WHERE folder = ? AND id = ?",
+            (folder, email_id)
+        ).fetchone()
+    return (row[0] or "") if row else ""
+
+
+def load_uid_marks(cache_file) -> Dict[str, List[int]]:
+    """Load the per-folder [uidvalidity, last_uid] high-water marks of previous syncs"""
+    cache_file = Path(cache_file)
+    if not cache_file.exists():
+        return {}
+
+    with closing(connect(cache_file)) as conn:
+        rows = conn.execute("SELECT folder, uidvalidity, last_uid FROM uid_marks").fetchall()
+    return {folder: [uidvalidity, last_uid] for folder, uidvalidity, last_uid in rows}
+
+
+def insert_emails(cache_file, account: str, emails: List[Dict], uid_marks: Dict[str, List[int]] = None,
+                  reset_folders: List[str] = None) -> int:
+    """Append emails to the cache, ignoring ones already stored, and record the synced UID marks
+
+    Emails of reset_folders are dropped first, as their UIDVALIDITY changed and the stored UIDs are stale.
+    """
+    with closing(connect(cache_file)) as conn:
+        with conn:
+            if reset_folders:
+                conn.executemany("DELETE FROM emails WHERE folder = ?", [(folder,) for folder in reset_folders])
+            cursor = conn.executemany(_INSERT, [_to_row(account, email_data) for email_data in emails])
+            _save_uid_marks(conn, uid_marks)
+        return cursor.rowcount
+
+
+def delete_email(cache_file, folder: str, email_id: str) -> int:
+    """Remove a single email from the cache, leaving the others and their bodies untouched"""
+    cache_file = Path(cache_file)
+    if not cache_file.exists():
+        return 0
+
+    with closing(connect(cache_file)) as conn:
+        with conn:
+            cursor = conn.execute("DELETE FROM emails WHERE folder = ? AND id = ?", (folder, email_id))
+        return cursor.rowcount
+
+
+def remove_cache(cache_file) -> bool:
+    """Delete the cache database and its WAL side files"""
+    cache_file = Path(cache_file)
+    removed = False
+    for suffix in CACHE_SUFFIXES:
+        path = cache_file.with_name(cache_file.name + suffix)
+        if path.exists():
+            path.unlink()
+            removed = True
+
+    legacy_file = cache_file.with_suffix('.json')
+    if legacy_file.exists():
+        legacy_file.unlink()
+        removed = True
+    return removed
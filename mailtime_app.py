@@ -28,9 +28,10 @@ from PyQt6.QtGui import QIcon, QPixmap, QTextCursor
 from PyQt6.QtWidgets import QSizePolicy
 
 from utils import load_svg_icon, get_status_circle, get_resource_path
-from workers import FileIOWorker, UpdateChecker
+from workers import FileIOWorker, UpdateChecker, shutdown_imap_loop
 from dialogs import AccountDialog, SettingsDialog, EmailSearchDialog, UpdateDialog
 from widgets import MailTab
+import email_cache
 
 mailtime_dir = Path.home() / ".mailtime"
 mailtime_dir.mkdir(exist_ok=True)
@@ -253,6 +254,10 @@ class MailClient(QMainWindow):
         self.search_timer.setSingleShot(True)
         self.search_timer.timeout.connect(self._do_email_search)
 
+        self.accounts_list_timer = QTimer()
+        self.accounts_list_timer.setSingleShot(True)
+        self.accounts_list_timer.timeout.connect(self._update_accounts_list)
+
         self.email_search_bar.textChanged.connect(self._on_search_text_changed)
         panel_layout.addWidget(self.email_search_bar)
 
@@ -416,6 +421,8 @@ class MailClient(QMainWindow):
                 if not tab.worker.wait(1000):
                     tab.worker.terminate()
 
+        shutdown_imap_loop()
+
         event.accept()
         log.info("Application cleanup completed")
 
@@ -641,7 +648,7 @@ class MailClient(QMainWindow):
         self.tab_status_map[tab] = False
         log.debug(f"Added tab for {account.get('email')}")
 
-        QTimer.singleShot(100, lambda: self._update_accounts_list())
+        self.schedule_accounts_list_update()
         return index
 
     def _add_mail_tab_at_position(self, account: Dict, account_index: int):
@@ -660,7 +667,7 @@ class MailClient(QMainWindow):
         self.tab_status_map[tab] = False
         log.debug(f"Added tab for {account.get('email')} at position {target_position}")
 
-        QTimer.singleShot(100, lambda: self._update_accounts_list())
+        self.schedule_accounts_list_update()
         return index
 
     def _truncate_email(self, email):
@@ -694,8 +701,13 @@ class MailClient(QMainWindow):
         truncated_local = f"{local_part[:5]}..{local_part[-3:]}"
         return f"{truncated_local}@{domain}"
 
+    def schedule_accounts_list_update(self):
+        """Coalesce bursts of account list refreshes (e.g. during Sync All) into one"""
+        self.accounts_list_timer.start(200)
+
     def _update_accounts_list(self):
         """Update the accounts list display"""
+        self.accounts_list_timer.stop()
         self.accounts_list.clear()
 
         active_accounts = []
@@ -766,16 +778,15 @@ class MailClient(QMainWindow):
                 email = account.get('email', '')
                 if email:
                     safe_email = hashlib.md5(email.encode()).hexdigest()
-                    cache_file = mailtime_dir / f"{safe_email}_emails.json"
-                    if cache_file.exists():
-                        cache_file.unlink()
+                    cache_file = mailtime_dir / f"{safe_email}_emails.db"
+                    if email_cache.remove_cache(cache_file):
                         log.info(f"Removed cache file for {email}")
 
             # Also clear any orphaned cache files (emails that match the pattern)
-            for cache_file in mailtime_dir.glob("*_emails.json"):
-                if cache_file.exists():
-                    cache_file.unlink()
-                    log.info(f"Removed orphaned cache file: {cache_file.name}")
+            for pattern in ("*_emails.db", "*_emails.json"):
+                for cache_file in mailtime_dir.glob(pattern):
+                    if email_cache.remove_cache(cache_file.with_suffix('.db')):
+                        log.info(f"Removed orphaned cache file: {cache_file.name}")
 
         except Exception as e:
             log.error(f"Error clearing cache files: {e}")
@@ -1052,7 +1063,7 @@ class MailClient(QMainWindow):
             self.tab_status_map[tab] = connected
 
             if hasattr(self, 'accounts_list'):
-                self._update_accounts_list()
+                self.schedule_accounts_list_update()
             log.debug(f"Updated tab status for {tab_name}: {status_text}")
 
     def _check_for_updates(self):
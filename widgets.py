@@ -1,8 +1,8 @@
 import logging
 import hashlib
+from functools import lru_cache
 from pathlib import Path
 from typing import Dict, List, Any
-from datetime import datetime
 from PyQt6.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout, QLabel, QComboBox, QPushButton,
     QTableWidget, QTableWidgetItem, QHeaderView, QSplitter, QTextEdit,
@@ -10,10 +10,146 @@ from PyQt6.QtWidgets import (
 )
 from PyQt6.QtCore import Qt
 from utils import load_svg_icon
-from workers import IMAPWorker, FileIOWorker, FolderWorker, IMAPDeleteWorker
+from workers import IMAPWorker, MultiFolderWorker, FileIOWorker, FolderWorker, IMAPDeleteWorker
+import email_cache
 
 log = logging.getLogger('MailClient')
 
+SYNC_BUTTON_STYLE = """
+    QPushButton {
+        background-color: #824ffb;
+        color: white;
+        border: none;
+        border-radius: 6px;
+        padding: 8px 15px;
+        font-size: 13px;
+        font-weight: bold;
+        margin-right: 3px;
+    }
+    QPushButton:hover {
+        background-color: #9366ff;
+    }
+    QPushButton:pressed {
+        background-color: #6b3dd9;
+    }
+    QPushButton:disabled {
+        background-color: #3a3a3a;
+        color: #666666;
+    }
+"""
+
+DISABLED_SYNC_BUTTON_STYLE = """
+    QPushButton {
+        background-color: #3a3a3a;
+        color: #666666;
+        border: none;
+        border-radius: 6px;
+        padding: 8px 15px;
+        font-size: 13px;
+        font-weight: bold;
+        margin-right: 3px;
+    }
+"""
+
+VIEW_BUTTON_STYLE = """
+    QPushButton {
+        background-color: #3a3a3a;
+        color: #e0e0e0;
+        border: 1px solid #4a4a4a;
+        padding: 8px 15px;
+        font-size: 13px;
+        font-weight: bold;
+        margin-right: 2px;
+    }
+    QPushButton:hover {
+        background-color: #4a4a4a;
+        border: 1px solid #824ffb;
+    }
+    QPushButton:pressed {
+        background-color: #824ffb;
+        color: white;
+    }
+"""
+
+ACTIVE_VIEW_BUTTON_STYLE = """
+    QPushButton {
+        background-color: #824ffb;
+        color: white;
+        border: 1px solid #824ffb;
+        padding: 8px 15px;
+        font-size: 13px;
+        font-weight: bold;
+        margin-right: 2px;
+    }
+    QPushButton:hover {
+        background-color: #9366ff;
+        border: 1px solid #9366ff;
+    }
+"""
+
+LEFT_RADIUS = "border-top-left-radius: 8px; border-bottom-left-radius: 8px;"
+RIGHT_RADIUS = "border-top-right-radius: 8px; border-bottom-right-radius: 8px;"
+
+VIEW_BTN_STYLE_LEFT = VIEW_BUTTON_STYLE + LEFT_RADIUS
+VIEW_BTN_STYLE_RIGHT = VIEW_BUTTON_STYLE + RIGHT_RADIUS
+ACTIVE_VIEW_BTN_STYLE_LEFT = ACTIVE_VIEW_BUTTON_STYLE + LEFT_RADIUS
+ACTIVE_VIEW_BTN_STYLE_RIGHT = ACTIVE_VIEW_BUTTON_STYLE + RIGHT_RADIUS
+
+DELETE_BUTTON_STYLE = """
+    QPushButton {
+        background-color: transparent;
+        border: none;
+        padding: 4px;
+        margin: 2px;
+    }
+    QPushButton:hover {
+        background-color: transparent;
+    }
+    QPushButton:pressed {
+        background-color: transparent;
+    }
+"""
+
+HEADER_TEMPLATE = (
+    "<div style='background-color: #f8f8f8; padding: 15px; margin-bottom: 15px; border-left: 4px solid #824ffb; font-family: Arial, sans-serif;'>"
+    "<div style='color: #333; font-size: 14px; margin-bottom: 8px;'><strong>From:</strong> {from_}</div>"
+    "<div style='color: #333; font-size: 14px; margin-bottom: 8px;'><strong>Subject:</strong> {subject}</div>"
+    "<div style='color: #333; font-size: 14px;'><strong>Date:</strong> {date}</div>"
+    "</div>"
+)
+
+PLAIN_BODY_TEMPLATE = "<pre style='color: #333; font-family: monospace; padding: 15px;'>{body}</pre>"
+
+POPUP_FIELD_TEMPLATE = "<span style='color: #999; font-weight: bold;'>{label}:</span> <span style='color: #e0e0e0;'>{value}</span>"
+
+_HTML_ESCAPE_TABLE = str.maketrans({
+    '&': '&amp;',
+    '<': '&lt;',
+    '>': '&gt;',
+    '"': '&quot;',
+    "'": '&#x27;',
+})
+
+
+def _escape(value) -> str:
+    """HTML-escape a header or plain-text value in a single pass"""
+    return str(value).translate(_HTML_ESCAPE_TABLE)
+
+
+NON_SYNC_FOLDERS = frozenset({"", "All Folders"})
+
+
+def _set_style(widget, style: str):
+    """Apply a stylesheet only if it differs, avoiding a needless CSS reparse"""
+    if widget.styleSheet() != style:
+        widget.setStyleSheet(style)
+
+
+@lru_cache(maxsize=64)
+def _load_body_html(cache_file: str, folder: str, email_id: str) -> str:
+    """Load an email's HTML body from the disk cache, keeping recently viewed ones hot"""
+    return email_cache.load_body_html(cache_file, folder, email_id)
+
 
 class MailTab(QWidget):
     def __init__(self, account: Dict, default_imap: Dict, parent_window):
@@ -114,29 +250,6 @@ class MailTab(QWidget):
             }
         """)
 
-        sync_button_style = """
-            QPushButton {
-                background-color: #824ffb;
-                color: white;
-                border: none;
-                border-radius: 6px;
-                padding: 8px 15px;
-                font-size: 13px;
-                font-weight: bold;
-                margin-right: 3px;
-            }
-            QPushButton:hover {
-                background-color: #9366ff;
-            }
-            QPushButton:pressed {
-                background-color: #6b3dd9;
-            }
-            QPushButton:disabled {
-                background-color: #3a3a3a;
-                color: #666666;
-            }
-        """
-
         self.folder_refresh_btn = QPushButton("")
         self.folder_refresh_btn.setIcon(load_svg_icon("folder", 16))
         self.folder_refresh_btn.setStyleSheet("""
@@ -164,12 +277,12 @@ class MailTab(QWidget):
 
         self.sync_folder_btn = QPushButton("Sync")
         self.sync_folder_btn.setIcon(load_svg_icon("refresh", 12))
-        self.sync_folder_btn.setStyleSheet(sync_button_style)
+        self.sync_folder_btn.setStyleSheet(SYNC_BUTTON_STYLE)
         self.sync_folder_btn.clicked.connect(self.sync_folder)
 
         self.sync_mailbox_btn = QPushButton("Sync All")
         self.sync_mailbox_btn.setIcon(load_svg_icon("refresh", 12))
-        self.sync_mailbox_btn.setStyleSheet(sync_button_style)
+        self.sync_mailbox_btn.setStyleSheet(SYNC_BUTTON_STYLE)
         self.sync_mailbox_btn.clicked.connect(self.sync_mailbox)
 
         self.clear_cache_btn = QPushButton("Clear")
@@ -308,44 +421,8 @@ class MailTab(QWidget):
         self.html_view_btn = QPushButton(" HTML")
         self.html_view_btn.setIcon(load_svg_icon("globe", 16))
 
-        view_button_style = """
-            QPushButton {
-                background-color: #3a3a3a;
-                color: #e0e0e0;
-                border: 1px solid #4a4a4a;
-                padding: 8px 15px;
-                font-size: 13px;
-                font-weight: bold;
-                margin-right: 2px;
-            }
-            QPushButton:hover {
-                background-color: #4a4a4a;
-                border: 1px solid #824ffb;
-            }
-            QPushButton:pressed {
-                background-color: #824ffb;
-                color: white;
-            }
-        """
-
-        active_button_style = """
-            QPushButton {
-                background-color: #824ffb;
-                color: white;
-                border: 1px solid #824ffb;
-                padding: 8px 15px;
-                font-size: 13px;
-                font-weight: bold;
-                margin-right: 2px;
-            }
-            QPushButton:hover {
-                background-color: #9366ff;
-                border: 1px solid #9366ff;
-            }
-        """
-
-        self.text_view_btn.setStyleSheet(active_button_style + "border-top-left-radius: 8px; border-bottom-left-radius: 8px;")
-        self.html_view_btn.setStyleSheet(view_button_style + "border-top-right-radius: 8px; border-bottom-right-radius: 8px;")
+        self.text_view_btn.setStyleSheet(ACTIVE_VIEW_BTN_STYLE_LEFT)
+        self.html_view_btn.setStyleSheet(VIEW_BTN_STYLE_RIGHT)
 
         self.text_view_btn.clicked.connect(lambda: self._set_view_mode("text"))
         self.html_view_btn.clicked.connect(lambda: self._set_view_mode("html"))
@@ -423,6 +500,13 @@ class MailTab(QWidget):
 
         self.emails = []
         self.all_emails = []
+        self.uid_marks = {}  # folder -> [uidvalidity, last_uid] already synced
+        self.uid_marks_changed = False
+        self.reset_folders = set()  # Folders whose cached emails are dropped on the next save
+        self.streamed_emails = []  # Emails of the running sync already added from its batches
+        self._by_folder = {}
+        self._by_folder_source = None
+        self._by_folder_count = 0
 
         self.folder_combo.currentTextChanged.connect(self._on_folder_changed)
 
@@ -442,24 +526,47 @@ class MailTab(QWidget):
             return
 
         if folder_name == "All Folders":
-            filtered_emails = self.all_emails.copy()
-            filtered_emails = sorted(filtered_emails, key=lambda x: x.get('date', ''), reverse=True)
-            show_folder_in_subject = True
-        elif folder_name == "Inbox":
-            filtered_emails = [email for email in self.all_emails
-                            if email.get('folder', 'Inbox') in ['Inbox', 'INBOX']]
-            show_folder_in_subject = False
+            filtered_emails = sorted(self.all_emails, key=lambda x: x.get('timestamp', 0), reverse=True)
         else:
-            filtered_emails = [email for email in self.all_emails
-                            if email.get('folder', '') == folder_name]
-            show_folder_in_subject = False
+            filtered_emails = list(self._emails_in_folder(folder_name))
 
         log.info(f"Filtering emails: {len(self.all_emails)} total -> {len(filtered_emails)} for folder '{folder_name}'")
 
+        self._populate_table(filtered_emails, show_folder_in_subject=folder_name == "All Folders")
+        log.info(f"Displayed {len(filtered_emails)} emails for folder '{folder_name}'")
+
+    def _emails_in_folder(self, folder_name: str) -> List[Dict]:
+        """Return the emails stored for a folder, using an index kept in step with all_emails
+
+        all_emails is only ever replaced or extended, so the index is rebuilt when the list
+        object changes and otherwise just absorbs the newly appended tail.
+        """
+        if folder_name == "All Folders":
+            return self.all_emails
+
+        if self._by_folder_source is not self.all_emails or self._by_folder_count > len(self.all_emails):
+            self._by_folder = {}
+            self._by_folder_source = self.all_emails
+            self._by_folder_count = 0
+
+        for email in self.all_emails[self._by_folder_count:]:
+            folder = email.get('folder', 'Inbox')
+            if folder == 'INBOX':
+                folder = 'Inbox'
+            self._by_folder.setdefault(folder, []).append(email)
+        self._by_folder_count = len(self.all_emails)
+
+        return self._by_folder.get('Inbox' if folder_name == 'INBOX' else folder_name, [])
+
+    def _populate_table(self, emails: List[Dict], show_folder_in_subject: bool = False):
+        """Fill the email table with the given emails"""
         self.email_table.setRowCount(0)
-        self.emails = filtered_emails
+        self.emails = emails
+        self._append_rows(emails, show_folder_in_subject)
 
-        for email in filtered_emails:
+    def _append_rows(self, emails: List[Dict], show_folder_in_subject: bool = False):
+        """Add table rows for emails already appended to self.emails"""
+        for email in emails:
             row = self.email_table.rowCount()
             self.email_table.insertRow(row)
             self.email_table.setItem(row, 0, QTableWidgetItem(email["id"]))
@@ -474,20 +581,7 @@ class MailTab(QWidget):
             # Add delete button
             delete_btn = QPushButton()
             delete_btn.setIcon(load_svg_icon("trash", 14, "#ff4444"))
-            delete_btn.setStyleSheet("""
-                QPushButton {
-                    background-color: transparent;
-                    border: none;
-                    padding: 4px;
-                    margin: 2px;
-                }
-                QPushButton:hover {
-                    background-color: transparent;
-                }
-                QPushButton:pressed {
-                    background-color: transparent;
-                }
-            """)
+            delete_btn.setStyleSheet(DELETE_BUTTON_STYLE)
 
             # Handle icon color change on hover manually
             def on_enter(event):
@@ -502,8 +596,6 @@ class MailTab(QWidget):
             delete_btn.clicked.connect(lambda checked, email_data=email: self._delete_email(email_data))
             self.email_table.setCellWidget(row, 4, delete_btn)
 
-        log.info(f"Displayed {len(filtered_emails)} emails for folder '{folder_name}'")
-
     def _delete_email(self, email_data):
         """Delete a specific email from the inbox and cache"""
         from PyQt6.QtWidgets import QMessageBox
@@ -542,14 +634,7 @@ class MailTab(QWidget):
             email_folder = email_data.get('folder', 'INBOX')
 
             # First delete from IMAP server
-            if self.account.get("use_default", True):
-                host = self.default_imap.get("host", "")
-                port = self.default_imap.get("port", 993)
-                use_ssl = self.default_imap.get("use_ssl", True)
-            else:
-                host = self.account.get("host", "")
-                port = self.account.get("port", 993)
-                use_ssl = self.account.get("use_ssl", True)
+            host, port, use_ssl = self._resolve_imap_settings()
 
             if not host:
                 QMessageBox.warning(self, "Delete Error", "No IMAP host configured, cannot delete from server")
@@ -584,9 +669,9 @@ class MailTab(QWidget):
         """Handle successful server deletion"""
         if success:
             log.info(f"Email deleted from server and locally: {email_data.get('subject', 'No Subject')}")
-            log.info("Clearing cache and resyncing due to IMAP email renumbering")
 
-            self.all_emails = []
+            # Emails are keyed by UID, which an expunge doesn't renumber, so only the deleted one is dropped
+            self.all_emails = [email for email in self.all_emails if email is not email_data]
             self.emails = []
 
             self.email_table.setRowCount(0)
@@ -596,10 +681,8 @@ class MailTab(QWidget):
                 self.preview_text.clear()
                 self.preview_html.clear()
 
-            self._save_cached_emails()
-
-            log.info("Starting fresh sync after delete to update email IDs")
-            self.sync_folder()
+            self._delete_cached_email(email_data)
+            self._filter_emails_by_folder(self.folder_combo.currentText())
 
     def _on_email_delete_error(self, error_msg, email_data):
         """Handle email deletion errors"""
@@ -625,7 +708,7 @@ class MailTab(QWidget):
         safe_email = hashlib.md5(email.encode()).hexdigest()
         cache_dir = Path.home() / ".mailtime"
         cache_dir.mkdir(exist_ok=True)
-        return cache_dir / f"{safe_email}_emails.json"
+        return cache_dir / f"{safe_email}_emails.db"
 
     def _load_cached_emails(self):
         """Load cached emails from disk asynchronously"""
@@ -640,6 +723,7 @@ class MailTab(QWidget):
     def _on_cache_loaded(self, cached_data):
         """Handle successful cache loading"""
         try:
+            self.uid_marks = cached_data.get('uid_marks', {}) if cached_data else {}
             if cached_data and 'emails' in cached_data:
                 self.all_emails = cached_data.get('emails', [])
                 log.info(f"Loaded {len(self.all_emails)} cached emails asynchronously")
@@ -657,8 +741,8 @@ class MailTab(QWidget):
                 self.viewing_cache = False
                 self.sync_error = None
 
-            if hasattr(self.parent_window, '_update_accounts_list'):
-                self.parent_window._update_accounts_list()
+            if hasattr(self.parent_window, 'schedule_accounts_list_update'):
+                self.parent_window.schedule_accounts_list_update()
 
         finally:
             self._set_cache_loading_state(False)
@@ -686,22 +770,49 @@ class MailTab(QWidget):
             self.sync_mailbox_btn.setEnabled(True)
             self.clear_cache_btn.setEnabled(True)
 
-    def _save_cached_emails(self):
-        """Save emails to disk cache asynchronously"""
-        cache_data = {
-            'account_email': self.account.get('email'),
-            'last_updated': datetime.now().isoformat(),
-            'emails': self.all_emails
-        }
+    def _save_cached_emails(self, emails: List[Dict]):
+        """Append new emails and the current UID marks to the disk cache asynchronously"""
+        self.uid_marks_changed = False
+        reset_folders, self.reset_folders = list(self.reset_folders), set()
 
         self.save_worker = FileIOWorker("save_cache",
                                       cache_file_path=str(self._get_cache_file_path()),
-                                      cache_data=cache_data)
+                                      account_email=self.account.get('email'),
+                                      emails=emails,
+                                      uid_marks=dict(self.uid_marks),
+                                      reset_folders=reset_folders)
+        self.save_worker.cache_saved.connect(lambda: self._drop_saved_bodies(emails))
         self.save_worker.cache_saved.connect(self._on_cache_saved)
         self.save_worker.error.connect(self._on_cache_save_error)
         self.save_worker.finished.connect(lambda: setattr(self, 'save_worker', None))
         self.save_worker.start()
 
+    def _delete_cached_email(self, email_data: Dict):
+        """Remove a deleted email from the disk cache asynchronously"""
+        self.delete_cache_worker = FileIOWorker("delete_cached_email",
+                                                cache_file_path=str(self._get_cache_file_path()),
+                                                folder=email_data.get('folder', 'INBOX'),
+                                                email_id=email_data.get('id', ''))
+        self.delete_cache_worker.error.connect(self._on_cache_save_error)
+        self.delete_cache_worker.finished.connect(lambda: setattr(self, 'delete_cache_worker', None))
+        self.delete_cache_worker.start()
+
+    def _drop_saved_bodies(self, emails: List[Dict]):
+        """Release HTML bodies that are now on disk; they are lazy-loaded on selection"""
+        for email_data in emails:
+            email_data.pop('body_html', None)
+
+    def _get_body_html(self, email_data: Dict) -> str:
+        """Return the email's HTML body from memory if not yet cached, otherwise from disk"""
+        if 'body_html' in email_data:
+            return email_data['body_html']
+        try:
+            return _load_body_html(str(self._get_cache_file_path()), email_data.get('folder', 'INBOX'),
+                                   email_data.get('id', ''))
+        except Exception as e:
+            log.error(f"Error loading email body from cache: {e}")
+            return ""
+
     def _on_cache_saved(self, success):
         """Handle successful cache saving"""
         if success:
@@ -717,7 +828,10 @@ class MailTab(QWidget):
 
         self.all_emails = []
         self.emails = []
+        self.uid_marks = {}
+        self.reset_folders = set()
         self.email_table.setRowCount(0)
+        _load_body_html.cache_clear()
 
         self.clear_worker = FileIOWorker("clear_cache", cache_file_path=str(self._get_cache_file_path()))
         self.clear_worker.cache_cleared.connect(self._on_cache_cleared)
@@ -769,14 +883,7 @@ class MailTab(QWidget):
 
         self._set_loading_state(True)
 
-        if self.account.get("use_default", True):
-            host = self.default_imap.get("host", "")
-            port = self.default_imap.get("port", 993)
-            use_ssl = self.default_imap.get("use_ssl", True)
-        else:
-            host = self.account.get("host", "")
-            port = self.account.get("port", 993)
-            use_ssl = self.account.get("use_ssl", True)
+        host, port, use_ssl = self._resolve_imap_settings()
 
         if not host:
             log.warning("No IMAP host configured, cannot fetch folders")
@@ -847,11 +954,8 @@ class MailTab(QWidget):
         self.last_sync_type = "mailbox"
         self.last_sync_folder = "ALL"
 
-        folders_to_sync = []
-        for i in range(self.folder_combo.count()):
-            folder_name = self.folder_combo.itemText(i)
-            if folder_name and folder_name != "" and folder_name != "All Folders":
-                folders_to_sync.append(folder_name)
+        folders_to_sync = [folder_name for i in range(self.folder_combo.count())
+                           if (folder_name := self.folder_combo.itemText(i)) not in NON_SYNC_FOLDERS]
 
         if not folders_to_sync:
             folders_to_sync = ["Inbox"]
@@ -859,83 +963,67 @@ class MailTab(QWidget):
         log.info(f"Syncing {len(folders_to_sync)} folders from dropdown: {folders_to_sync}")
         self._sync_multiple_folders(folders_to_sync)
 
-    def _sync_multiple_folders(self, folders):
-        """Sync multiple folders sequentially, preserving emails"""
-        self.folders_to_sync = folders.copy()
-        self.current_folder_index = 0
-        self.all_emails = []
-        self._sync_next_folder()
-
-    def _sync_next_folder(self):
-        """Sync the next folder in the list"""
-        if self.current_folder_index >= len(self.folders_to_sync):
-            log.info(f"All folders synced, found {len(self.all_emails)} total emails")
-            self._on_all_folders_synced(self.all_emails)
-            return
-
-        folder_name = self.folders_to_sync[self.current_folder_index]
-        log.info(f"Syncing folder {self.current_folder_index + 1}/{len(self.folders_to_sync)}: {folder_name}")
-
+    def _resolve_imap_settings(self):
+        """Return (host, port, use_ssl) from the default IMAP settings or the account's own"""
         if self.account.get("use_default", True):
-            host = self.default_imap.get("host", "")
-            port = self.default_imap.get("port", 993)
-            use_ssl = self.default_imap.get("use_ssl", True)
+            settings = self.default_imap
         else:
-            host = self.account.get("host", "")
-            port = self.account.get("port", 993)
-            use_ssl = self.account.get("use_ssl", True)
+            settings = self.account
+        return settings.get("host", ""), settings.get("port", 993), settings.get("use_ssl", True)
 
+    def _sync_multiple_folders(self, folders):
+        """Sync multiple folders concurrently in one worker, preserving emails"""
+        host, port, use_ssl = self._resolve_imap_settings()
         if not host:
             log.error("No IMAP host configured!")
             self._enable_sync_buttons()
             return
 
-        self.worker = IMAPWorker(
+        self.worker = MultiFolderWorker(
             self.account["email"],
             self.account["password"],
             host,
             port,
             use_ssl,
-            folder_name
+            folders,
+            self.uid_marks,
+            self._known_uids()
         )
-        self.worker.finished.connect(self._on_folder_emails_loaded)
+        self.worker.uid_marks_updated.connect(self._on_uid_marks_updated)
+        self.worker.uidvalidity_reset.connect(self._on_uidvalidity_reset)
+        self.worker.finished.connect(self._on_mailbox_emails_loaded)
         self.worker.error.connect(self._on_error)
         self.worker.connection_status.connect(self._update_connection_status)
         self.worker.start()
 
-    def _on_folder_emails_loaded(self, emails):
-        """Handle emails from a single folder during multi-folder sync"""
-        folder_name = self.folders_to_sync[self.current_folder_index]
-        log.info(f"Loaded {len(emails)} emails from folder: {folder_name}")
-
-        for email_data in emails:
-            email_data['folder'] = folder_name
-        self.all_emails.extend(emails)
-
-        self.current_folder_index += 1
-        self._sync_next_folder()
+    def _on_mailbox_emails_loaded(self, emails):
+        """Handle emails from all folders of a multi-folder sync"""
+        log.info(f"All folders synced, found {len(emails)} new emails")
+        self._on_all_folders_synced(emails)
 
     def _on_all_folders_synced(self, all_emails):
         """Called when all folders have been synced"""
-        sorted_emails = sorted(all_emails, key=lambda x: x.get('date', ''), reverse=True)[:200]
+        # Keep everything: the UID marks already cover these, so anything dropped would never be fetched again
+        sorted_emails = sorted(all_emails, key=lambda x: x.get('timestamp', 0), reverse=True)
 
         if not hasattr(self, 'all_emails'):
             self.all_emails = []
 
-        existing_ids = {email['id'] for email in self.all_emails}
-        new_emails = [email for email in sorted_emails if email['id'] not in existing_ids]
+        # UIDs are only unique within a folder, so dedupe on the folder too
+        existing_keys = {(email['id'], email.get('folder', 'INBOX')) for email in self.all_emails}
+        new_emails = [email for email in sorted_emails if (email['id'], email.get('folder', 'INBOX')) not in existing_keys]
         self.all_emails.extend(new_emails)
 
         log.info(f"Multi-folder sync: Added {len(new_emails)} new emails to storage, total stored: {len(self.all_emails)}")
 
-        if new_emails:
-            self._save_cached_emails()
+        if new_emails or self.uid_marks_changed:
+            self._save_cached_emails(new_emails)
 
         current_folder = self.folder_combo.currentText()
         self._filter_emails_by_folder(current_folder)
 
         self._enable_sync_buttons()
-        self.parent_window._update_accounts_list()
+        self.parent_window.schedule_accounts_list_update()
 
     def _disable_sync_buttons(self, text):
         self._set_loading_state(True)
@@ -949,65 +1037,27 @@ class MailTab(QWidget):
             self.folder_refresh_btn.setText("")
             self.folder_refresh_btn.setEnabled(False)
 
-            disabled_style = """
-                QPushButton {
-                    background-color: #3a3a3a;
-                    color: #666666;
-                    border: none;
-                    border-radius: 6px;
-                    padding: 8px 15px;
-                    font-size: 13px;
-                    font-weight: bold;
-                    margin-right: 3px;
-                }
-            """
             self.sync_folder_btn.setEnabled(False)
-            self.sync_folder_btn.setStyleSheet(disabled_style)
+            _set_style(self.sync_folder_btn, DISABLED_SYNC_BUTTON_STYLE)
             self.sync_mailbox_btn.setEnabled(False)
-            self.sync_mailbox_btn.setStyleSheet(disabled_style)
+            _set_style(self.sync_mailbox_btn, DISABLED_SYNC_BUTTON_STYLE)
             self.clear_cache_btn.setEnabled(False)
         else:
             self.folder_refresh_btn.setText("")
             self.folder_refresh_btn.setEnabled(True)
 
-            sync_button_style = """
-                QPushButton {
-                    background-color: #824ffb;
-                    color: white;
-                    border: none;
-                    border-radius: 6px;
-                    padding: 8px 15px;
-                    font-size: 13px;
-                    font-weight: bold;
-                    margin-right: 3px;
-                }
-                QPushButton:hover {
-                    background-color: #9366ff;
-                }
-                QPushButton:pressed {
-                    background-color: #6b3dd9;
-                }
-            """
             self.sync_folder_btn.setEnabled(True)
             self.sync_folder_btn.setText("Sync")
-            self.sync_folder_btn.setStyleSheet(sync_button_style)
+            _set_style(self.sync_folder_btn, SYNC_BUTTON_STYLE)
             self.sync_mailbox_btn.setEnabled(True)
             self.sync_mailbox_btn.setText("Sync All")
-            self.sync_mailbox_btn.setStyleSheet(sync_button_style)
+            _set_style(self.sync_mailbox_btn, SYNC_BUTTON_STYLE)
             self.clear_cache_btn.setEnabled(True)
 
     def _perform_sync(self, folder):
         """Execute email synchronization with progress updates"""
-        if self.account.get("use_default", True):
-            host = self.default_imap.get("host", "")
-            port = self.default_imap.get("port", 993)
-            use_ssl = self.default_imap.get("use_ssl", True)
-            log.debug(f"Using default IMAP: {host}:{port}")
-        else:
-            host = self.account.get("host", "")
-            port = self.account.get("port", 993)
-            use_ssl = self.account.get("use_ssl", True)
-            log.debug(f"Using account-specific IMAP: {host}:{port}")
+        host, port, use_ssl = self._resolve_imap_settings()
+        log.debug(f"Using {'default' if self.account.get('use_default', True) else 'account-specific'} IMAP: {host}:{port}")
 
         if not host:
             log.error("No IMAP host configured!")
@@ -1024,8 +1074,14 @@ class MailTab(QWidget):
             host,
             port,
             use_ssl,
-            folder
+            folder,
+            self.uid_marks,
+            self._known_uids()
         )
+        self.streamed_emails = []
+        self.worker.uid_marks_updated.connect(self._on_uid_marks_updated)
+        self.worker.uidvalidity_reset.connect(self._on_uidvalidity_reset)
+        self.worker.batch_ready.connect(self._on_email_batch_loaded)
         self.worker.finished.connect(self._on_emails_loaded)
         self.worker.error.connect(self._on_error)
         self.worker.connection_status.connect(self._update_connection_status)
@@ -1033,6 +1089,31 @@ class MailTab(QWidget):
         self.worker.error.connect(lambda: self._restore_cursor())
         self.worker.start()
 
+    def _known_uids(self) -> Dict[str, set]:
+        """UIDs stored per folder above its UID mark, so a sync can skip them while catching up"""
+        known = {}
+        for email in self.all_emails:
+            folder = email.get('folder', 'INBOX')
+            mark = self.uid_marks.get(folder)
+            uid = email.get('id', '')
+            if mark and uid.isdigit() and int(uid) > mark[1]:
+                known.setdefault(folder, set()).add(int(uid))
+        return known
+
+    def _on_uid_marks_updated(self, uid_marks: Dict):
+        """Remember the UID marks of a finished sync; they are saved along with its emails"""
+        if any(self.uid_marks.get(folder) != mark for folder, mark in uid_marks.items()):
+            self.uid_marks.update(uid_marks)
+            self.uid_marks_changed = True
+
+    def _on_uidvalidity_reset(self, folder: str):
+        """Drop a folder's emails when the server renumbered its UIDs; the running sync refetches it"""
+        self.all_emails = [email for email in self.all_emails if email.get('folder', 'INBOX') != folder]
+        self.streamed_emails = [email for email in self.streamed_emails if email.get('folder', 'INBOX') != folder]
+        self.reset_folders.add(folder)
+        _load_body_html.cache_clear()
+        self._filter_emails_by_folder(self.folder_combo.currentText())
+
     def _update_connection_status(self, status):
         """Update connection status: True (green), False (red), 'cache' (yellow)"""
         log.debug(f"Updating connection status for {self.account.get('email')} to: {status}")
@@ -1054,10 +1135,8 @@ class MailTab(QWidget):
         else:
             log.error(f"Parent window missing update_tab_status method. Type: {type(self.parent_window)}")
 
-    def _on_emails_loaded(self, emails: List[Dict]):
-        """Handle emails received from IMAP worker"""
-        log.info(f"Loading {len(emails)} emails into storage")
-
+    def _add_synced_emails(self, emails: List[Dict]) -> List[Dict]:
+        """Tag emails of a single-folder sync with its folder and append the unseen ones to all_emails"""
         folder_name = self.last_sync_folder if self.last_sync_folder and self.last_sync_folder != "ALL" else "Inbox"
         for email_data in emails:
             email_data['folder'] = folder_name
@@ -1065,23 +1144,49 @@ class MailTab(QWidget):
         if not hasattr(self, 'all_emails'):
             self.all_emails = []
 
-        # Create unique keys using id + subject + from for better deduplication
-        existing_keys = {(email['id'], email.get('subject', ''), email.get('from', '')) for email in self.all_emails}
+        # UIDs are only unique within a folder, so dedupe on the folder too
+        existing_keys = {(email['id'], email.get('folder', 'INBOX')) for email in self.all_emails}
         new_emails = []
 
         for email in emails:
-            email_key = (email['id'], email.get('subject', ''), email.get('from', ''))
+            email_key = (email['id'], email['folder'])
             if email_key not in existing_keys:
                 new_emails.append(email)
                 existing_keys.add(email_key)
             else:
                 log.debug(f"Skipping duplicate email: ID {email['id']}, Subject: {email.get('subject', 'No Subject')[:50]}")
         self.all_emails.extend(new_emails)
+        return new_emails
+
+    def _on_email_batch_loaded(self, emails: List[Dict]):
+        """Show a batch of a running sync right away instead of waiting for the whole folder"""
+        new_emails = self._add_synced_emails(emails)
+        if not new_emails:
+            return
+        self.streamed_emails.extend(new_emails)
+
+        current_folder = self.folder_combo.currentText()
+        synced_folder = new_emails[0]['folder']
+        inbox = ('INBOX', 'Inbox')
+        if current_folder == "All Folders":
+            # Sorted by date, so the batch can't just go at the end
+            self._filter_emails_by_folder(current_folder)
+        elif synced_folder == current_folder or (synced_folder in inbox and current_folder in inbox):
+            self.emails.extend(new_emails)
+            self._append_rows(new_emails)
+
+    def _on_emails_loaded(self, emails: List[Dict]):
+        """Handle emails received from IMAP worker"""
+        log.info(f"Loading {len(emails)} emails into storage")
+
+        # Most of them normally arrived through batch_ready already
+        new_emails = self.streamed_emails + self._add_synced_emails(emails)
+        self.streamed_emails = []
 
         log.info(f"Added {len(new_emails)} new emails to storage, total stored: {len(self.all_emails)}")
 
-        if new_emails:
-            self._save_cached_emails()
+        if new_emails or self.uid_marks_changed:
+            self._save_cached_emails(new_emails)
 
         self.viewing_cache = False
         self.sync_error = None
@@ -1090,7 +1195,7 @@ class MailTab(QWidget):
         self._filter_emails_by_folder(current_folder)
 
         self._enable_sync_buttons()
-        self.parent_window._update_accounts_list()
+        self.parent_window.schedule_accounts_list_update()
         log.info("Email storage and filtering updated successfully")
 
         # Check for pending email deletion after sync
@@ -1140,50 +1245,16 @@ class MailTab(QWidget):
                 self._update_preview_mode()
 
     def _set_view_mode(self, mode):
+        if mode == self.current_view_mode:
+            return
         self.current_view_mode = mode
 
-        view_button_style = """
-            QPushButton {
-                background-color: #3a3a3a;
-                color: #e0e0e0;
-                border: 1px solid #4a4a4a;
-                padding: 8px 15px;
-                font-size: 13px;
-                font-weight: bold;
-                margin-right: 2px;
-            }
-            QPushButton:hover {
-                background-color: #4a4a4a;
-                border: 1px solid #824ffb;
-            }
-            QPushButton:pressed {
-                background-color: #824ffb;
-                color: white;
-            }
-        """
-
-        active_button_style = """
-            QPushButton {
-                background-color: #824ffb;
-                color: white;
-                border: 1px solid #824ffb;
-                padding: 8px 15px;
-                font-size: 13px;
-                font-weight: bold;
-                margin-right: 2px;
-            }
-            QPushButton:hover {
-                background-color: #9366ff;
-                border: 1px solid #9366ff;
-            }
-        """
-
         if mode == "text":
-            self.text_view_btn.setStyleSheet(active_button_style + "border-top-left-radius: 8px; border-bottom-left-radius: 8px;")
-            self.html_view_btn.setStyleSheet(view_button_style + "border-top-right-radius: 8px; border-bottom-right-radius: 8px;")
+            self.text_view_btn.setStyleSheet(ACTIVE_VIEW_BTN_STYLE_LEFT)
+            self.html_view_btn.setStyleSheet(VIEW_BTN_STYLE_RIGHT)
         else:
-            self.text_view_btn.setStyleSheet(view_button_style + "border-top-left-radius: 8px; border-bottom-left-radius: 8px;")
-            self.html_view_btn.setStyleSheet(active_button_style + "border-top-right-radius: 8px; border-bottom-right-radius: 8px;")
+            self.text_view_btn.setStyleSheet(VIEW_BTN_STYLE_LEFT)
+            self.html_view_btn.setStyleSheet(ACTIVE_VIEW_BTN_STYLE_RIGHT)
 
         self._update_preview_mode()
 
@@ -1207,19 +1278,18 @@ class MailTab(QWidget):
             self.preview_text.hide()
             self.preview_html.show()
 
-            header_html = f"""
-            <div style='background-color: #f8f8f8; padding: 15px; margin-bottom: 15px; border-left: 4px solid #824ffb; font-family: Arial, sans-serif;'>
-                <div style='color: #333; font-size: 14px; margin-bottom: 8px;'><strong>From:</strong> {email_data['from']}</div>
-                <div style='color: #333; font-size: 14px; margin-bottom: 8px;'><strong>Subject:</strong> {email_data['subject']}</div>
-                <div style='color: #333; font-size: 14px;'><strong>Date:</strong> {email_data['date']}</div>
-            </div>
-            """
+            header_html = HEADER_TEMPLATE.format_map({
+                'from_': _escape(email_data['from']),
+                'subject': _escape(email_data['subject']),
+                'date': _escape(email_data['date'])
+            })
 
-            if email_data.get('body_html'):
-                full_html = header_html + email_data['body_html']
+            body_html = self._get_body_html(email_data)
+            if body_html:
+                full_html = header_html + body_html
                 self.preview_html.setHtml(full_html)
             else:
-                full_html = header_html + f"<pre style='color: #333; font-family: monospace; padding: 15px;'>{email_data['body_text']}</pre>"
+                full_html = header_html + PLAIN_BODY_TEMPLATE.format(body=_escape(email_data['body_text']))
                 self.preview_html.setHtml(full_html)
             log.debug(f"Switched to HTML view for email ID {email_data['id']}")
 
@@ -1251,15 +1321,15 @@ class MailTab(QWidget):
         header_layout.setContentsMargins(20, 15, 20, 15)
         header_layout.setSpacing(8)
 
-        from_label = QLabel(f"<span style='color: #999; font-weight: bold;'>From:</span> <span style='color: #e0e0e0;'>{email_data['from']}</span>")
+        from_label = QLabel(POPUP_FIELD_TEMPLATE.format(label="From", value=_escape(email_data['from'])))
         from_label.setStyleSheet("font-size: 14px;")
         from_label.setWordWrap(True)
 
-        subject_label = QLabel(f"<span style='color: #999; font-weight: bold;'>Subject:</span> <span style='color: #e0e0e0;'>{email_data['subject']}</span>")
+        subject_label = QLabel(POPUP_FIELD_TEMPLATE.format(label="Subject", value=_escape(email_data['subject'])))
         subject_label.setStyleSheet("font-size: 14px;")
         subject_label.setWordWrap(True)
 
-        date_label = QLabel(f"<span style='color: #999; font-weight: bold;'>Date:</span> <span style='color: #e0e0e0;'>{email_data['date']}</span>")
+        date_label = QLabel(POPUP_FIELD_TEMPLATE.format(label="Date", value=_escape(email_data['date'])))
         date_label.setStyleSheet("font-size: 14px;")
 
         header_layout.addWidget(from_label)
@@ -1276,44 +1346,8 @@ class MailTab(QWidget):
         popup_html_btn = QPushButton(" HTML")
         popup_html_btn.setIcon(load_svg_icon("globe", 16))
 
-        popup_view_button_style = """
-            QPushButton {
-                background-color: #3a3a3a;
-                color: #e0e0e0;
-                border: 1px solid #4a4a4a;
-                padding: 8px 15px;
-                font-size: 13px;
-                font-weight: bold;
-                margin-right: 2px;
-            }
-            QPushButton:hover {
-                background-color: #4a4a4a;
-                border: 1px solid #824ffb;
-            }
-            QPushButton:pressed {
-                background-color: #824ffb;
-                color: white;
-            }
-        """
-
-        popup_active_button_style = """
-            QPushButton {
-                background-color: #824ffb;
-                color: white;
-                border: 1px solid #824ffb;
-                padding: 8px 15px;
-                font-size: 13px;
-                font-weight: bold;
-                margin-right: 2px;
-            }
-            QPushButton:hover {
-                background-color: #9366ff;
-                border: 1px solid #9366ff;
-            }
-        """
-
-        popup_text_btn.setStyleSheet(popup_active_button_style + "border-top-left-radius: 8px; border-bottom-left-radius: 8px;")
-        popup_html_btn.setStyleSheet(popup_view_button_style + "border-top-right-radius: 8px; border-bottom-right-radius: 8px;")
+        popup_text_btn.setStyleSheet(ACTIVE_VIEW_BTN_STYLE_LEFT)
+        popup_html_btn.setStyleSheet(VIEW_BTN_STYLE_RIGHT)
 
         toolbar_layout.addWidget(popup_text_btn)
         toolbar_layout.addWidget(popup_html_btn)
@@ -1348,10 +1382,11 @@ class MailTab(QWidget):
             }
         """)
 
-        if email_data.get('body_html'):
-            popup_html_view.setHtml(email_data['body_html'])
+        body_html = self._get_body_html(email_data)
+        if body_html:
+            popup_html_view.setHtml(body_html)
         else:
-            popup_html_view.setHtml(f"<pre style='color: #333; font-family: monospace; padding: 15px;'>{email_data['body_text']}</pre>")
+            popup_html_view.setHtml(PLAIN_BODY_TEMPLATE.format(body=_escape(email_data['body_text'])))
 
         popup_html_view.hide()
 
@@ -1360,15 +1395,15 @@ class MailTab(QWidget):
 
         def set_popup_text_view():
             """Switch popup to text view mode"""
-            popup_text_btn.setStyleSheet(popup_active_button_style + "border-top-left-radius: 8px; border-bottom-left-radius: 8px;")
-            popup_html_btn.setStyleSheet(popup_view_button_style + "border-top-right-radius: 8px; border-bottom-right-radius: 8px;")
+            _set_style(popup_text_btn, ACTIVE_VIEW_BTN_STYLE_LEFT)
+            _set_style(popup_html_btn, VIEW_BTN_STYLE_RIGHT)
             popup_html_view.hide()
             popup_text_view.show()
 
         def set_popup_html_view():
             """Switch popup to HTML view mode"""
-            popup_text_btn.setStyleSheet(popup_view_button_style + "border-top-left-radius: 8px; border-bottom-left-radius: 8px;")
-            popup_html_btn.setStyleSheet(popup_active_button_style + "border-top-right-radius: 8px; border-bottom-right-radius: 8px;")
+            _set_style(popup_text_btn, VIEW_BTN_STYLE_LEFT)
+            _set_style(popup_html_btn, ACTIVE_VIEW_BTN_STYLE_RIGHT)
             popup_text_view.hide()
             popup_html_view.show()
 
@@ -1385,6 +1420,11 @@ class MailTab(QWidget):
     def _on_error(self, error: str):
         log.error(f"Sync failed: {error}")
 
+        # Batches shown before the failure are in all_emails, so a retry would skip them as duplicates
+        if self.streamed_emails or self.reset_folders:
+            self._save_cached_emails(self.streamed_emails)
+            self.streamed_emails = []
+
         self.sync_error = error
         self.viewing_cache = False
         self.is_connected = False
@@ -1393,7 +1433,7 @@ class MailTab(QWidget):
         QMessageBox.critical(self, "Email Sync Error", detailed_error)
 
         self._enable_sync_buttons()
-        self.parent_window._update_accounts_list()
+        self.parent_window.schedule_accounts_list_update()
 
 
     def edit_account(self):
@@ -1409,49 +1449,39 @@ class MailTab(QWidget):
             log.info(f"Updated account settings for {self.account.get('email')}")
 
     def filter_emails(self, search_text: str):
-        """Filter displayed emails based on search text"""
+        """Filter displayed emails in the current folder based on search text"""
         try:
             if not hasattr(self, 'all_emails') or not self.all_emails:
                 log.debug("No emails to filter")
                 return
 
             search_text = search_text.strip().lower()
+            current_folder = self.folder_combo.currentText()
 
             if not search_text:
-                if hasattr(self, '_filter_emails_by_folder'):
-                    self._filter_emails_by_folder()
-                else:
-                    current_folder = getattr(self, 'current_folder', 'Inbox')
-                    self.emails = [email for email in self.all_emails if email.get('folder', 'INBOX') == current_folder]
-                    self._populate_table()
+                self._filter_emails_by_folder(current_folder)
                 return
 
             filtered_emails = []
-            for email in self.all_emails:
+            for email in self._emails_in_folder(current_folder):
                 if not isinstance(email, dict):
                     continue
 
                 try:
-                    subject = str(email.get('subject', '')).lower()
-                    from_addr = str(email.get('from', '')).lower()
-                    body_text = str(email.get('body_text', '')).lower()
-
-                    if search_text in subject or search_text in from_addr or search_text in body_text:
+                    if (search_text in str(email.get('subject', '')).lower() or
+                        search_text in str(email.get('from', '')).lower() or
+                        search_text in str(email.get('body_text', '')).lower()):
                         filtered_emails.append(email)
 
                 except Exception as e:
                     log.debug(f"Error processing email during search: {e}")
                     continue
 
-            current_folder = getattr(self, 'current_folder', 'Inbox')
-            self.emails = [email for email in filtered_emails if email.get('folder', 'INBOX') == current_folder]
-
-            if hasattr(self, 'email_table') and hasattr(self, '_populate_table'):
-                self._populate_table()
+            self._populate_table(filtered_emails, show_folder_in_subject=current_folder == "All Folders")
 
             log.debug(f"Search complete: {len(self.emails)} results for '{search_text}'")
 
         except Exception as e:
             log.error(f"Critical error in filter_emails: {e}")
             if hasattr(self, 'email_table'):
-                self.email_table.setRowCount(0)
\ No newline at end of file
+                self.email_table.setRowCount(0)
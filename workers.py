@@ -1,54 +1,575 @@
 import asyncio
+import base64
+import binascii
+import heapq
 import logging
 import json
+import mmap
+import os
+import quopri
+import random
+import re
+import ssl
+import threading
+import time
 import urllib.request
 import urllib.error
+from contextlib import asynccontextmanager
+from itertools import takewhile
 from pathlib import Path
-from typing import Dict, Any
+from typing import Dict, List, Optional
 from PyQt6.QtCore import QThread, pyqtSignal
-from aioimaplib import IMAP4_SSL, IMAP4
+from aioimaplib import IMAP4_SSL, IMAP4, Command
 import email
+import email.policy
+from email.header import decode_header, make_header
+from email.parser import BytesHeaderParser
 from email.utils import parsedate_to_datetime
+from packaging.version import InvalidVersion, Version
+import email_cache
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 log = logging.getLogger('MailClient')
 
+# Built once and shared by every IMAP worker, so the CA store isn't reloaded for each connection
+SSL_CONTEXT = ssl.create_default_context(ssl.Purpose.SERVER_AUTH)
+
+# Data line that opens one message in a FETCH response, e.g. b'12 FETCH (UID 340 RFC822 {2048}'
+_FETCH_LINE_RE = re.compile(rb'^(\d+) FETCH \(')
+# Item announcing the literal that follows, e.g. b'BODY[TEXT]<0> {4096}'; RFC822 is keyed as the empty section
+_FETCH_LITERAL_RE = re.compile(rb'(?:BODY\[([^\]]*)\]|RFC822)(?:<\d+>)?\s*\{\d+\}$', re.IGNORECASE)
+_UID_RE = re.compile(rb'\bUID (\d+)')
+_UIDVALIDITY_RE = re.compile(rb'\[UIDVALIDITY (\d+)\]')
+# One token of an IMAP parenthesized list: open, close, quoted string or atom
+_SEXP_TOKEN_RE = re.compile(rb'\s*(?:(\()|(\))|"((?:[^"\\]|\\.)*)"|([^\s()"]+))')
+
+# LIST response line, e.g. b'(\\HasNoChildren) "/" "Sent Items"'; the delimiter is NIL for flat namespaces
+_LIST_RE = re.compile(rb'\((?P<flags>[^)]*)\)\s+(?:"(?P<delim>[^"]*)"|NIL)\s+'
+                      rb'(?:"(?P<quoted>(?:[^"\\]|\\.)*)"|(?P<unquoted>[^\s"]+))', re.IGNORECASE)
+_QUOTED_ESCAPE_RE = re.compile(rb'\\(.)')
+
+# Length of the body_text preview kept for each email
+PREVIEW_CHARS = 500
+
+# Logs smaller than this are read whole; larger ones are memory-mapped for the tail scan
+LOG_MMAP_THRESHOLD = 256 * 1024
+
+# Only the headers we display plus those needed to decode the (truncated) body
+_HEADER_FIELDS = "FROM SUBJECT DATE CONTENT-TYPE CONTENT-TRANSFER-ENCODING"
+# Stateless, so one instance is shared by the parse threads
+_HEADER_PARSER = BytesHeaderParser()
+
+# Folders never synced or listed; names merely containing one of these are skipped too
+_EXCLUDED_FOLDERS = frozenset({'Arquivo Morto', 'Archive', 'Outbox'})
+_EXCLUDED_FOLDER_RE = re.compile('|'.join(map(re.escape, sorted(_EXCLUDED_FOLDERS))))
+
+# Well-known folders listed first in the dropdown, in this order, under any of their usual names
+_FOLDER_MAPPINGS = {
+    'INBOX': ['INBOX', 'Inbox'],
+    'SENT': ['SENT', 'Sent', 'Sent Items', 'Sent Mail'],
+    'DRAFTS': ['DRAFTS', 'Drafts', 'Draft'],
+    'TRASH': ['TRASH', 'Trash', 'Deleted', 'Deleted Items'],
+    'SPAM': ['SPAM', 'Spam', 'Junk', 'Junk E-mail', 'Bulk Mail'],
+    'NOTES': ['NOTES', 'Notes']
+}
+_FOLDER_ORDER = {variation: order for order, variations in enumerate(_FOLDER_MAPPINGS.values())
+                 for variation in variations}
+
+# Connections are bound to the event loop that opened them, so all IMAP work runs on one long-lived
+# loop in a background thread; worker threads submit coroutines to it and block on the result
+_imap_loop = None
+_imap_loop_lock = threading.Lock()
+
+
+def _jittered_backoff(attempt: int, base: float = 0.5, cap: float = 8.0) -> float:
+    """Full-jitter exponential backoff, so clients failing together don't all retry in the same second"""
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
+
+
+def _json_dumps(data) -> bytes:
+    """Compact UTF-8 JSON, using orjson when it is installed"""
+    if orjson is not None:
+        return orjson.dumps(data, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(data, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+def _json_loads(raw: bytes):
+    # orjson.JSONDecodeError subclasses json.JSONDecodeError, so callers catch either the same way
+    if orjson is not None:
+        return orjson.loads(raw)
+    return json.loads(raw)
+
+
+def _write_json_atomic(path: Path, data):
+    """Write data as JSON to a temp file and rename it over path, so readers never see a partial file
+
+    The temp file is fsynced before the rename, and the directory after it where the platform allows,
+    so a crash can't leave an empty file in place of the old one.
+    """
+    tmp_path = path.with_name(path.name + '.tmp')
+    with open(tmp_path, 'wb') as f:
+        f.write(_json_dumps(data))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+    # Directories can't be opened for fsync on Windows
+    if hasattr(os, 'O_DIRECTORY'):
+        dir_fd = os.open(path.parent, os.O_RDONLY | os.O_DIRECTORY)
+        try:
+            os.fsync(dir_fd)
+        finally:
+            os.close(dir_fd)
+
+
+def _optimize_sequence(ids) -> str:
+    """Compress message numbers into an IMAP sequence set, e.g. [1, 2, 3, 7] -> '1:3,7'"""
+    ranges = []
+    for num in sorted(set(ids)):
+        if ranges and num == ranges[-1][1] + 1:
+            ranges[-1][1] = num
+        else:
+            ranges.append([num, num])
+    return ",".join(str(start) if start == end else f"{start}:{end}" for start, end in ranges)
+
+
+def _split_fetch_response(data) -> Dict[int, Dict[bytes, bytes]]:
+    """Map each message UID in a UID FETCH response to its literals, keyed by body section"""
+    raw_messages = {}
+    sections = None
+    section = None
+    for line in data:
+        if isinstance(line, bytearray):
+            if sections is not None and section is not None:
+                sections[section] = bytes(line)
+            section = None
+            continue
+
+        if _FETCH_LINE_RE.match(line):
+            sections = {}
+        if sections is None:
+            continue
+        # Servers may send the UID item before or after the body literals
+        uid = _UID_RE.search(line)
+        if uid:
+            raw_messages[int(uid.group(1))] = sections
+        literal = _FETCH_LITERAL_RE.search(line)
+        section = (literal.group(1) or b'').upper() if literal else None
+    return raw_messages
+
+
+def _run_on_imap_loop(coro, timeout: float = None):
+    """Run coro on the shared IMAP event loop and wait for its result in the calling thread"""
+    global _imap_loop
+    with _imap_loop_lock:
+        if _imap_loop is None:
+            _imap_loop = asyncio.new_event_loop()
+            threading.Thread(target=_serve_imap_loop, args=(_imap_loop,), name="imap-loop", daemon=True).start()
+    return asyncio.run_coroutine_threadsafe(asyncio.wait_for(coro, timeout), _imap_loop).result()
+
+
+def _serve_imap_loop(loop: asyncio.AbstractEventLoop):
+    asyncio.set_event_loop(loop)
+    try:
+        loop.run_forever()
+    finally:
+        loop.close()
+
+
+async def _open_connection(host: str, port: int, use_ssl: bool, email_addr: str, password: str):
+    log.debug(f"Connecting to {host}:{port}")
+    if use_ssl:
+        mail = IMAP4_SSL(host, port=port, ssl_context=SSL_CONTEXT)
+    else:
+        mail = IMAP4(host, port=port)
+
+    try:
+        await mail.wait_hello_from_server()
+        log.debug("Server hello received")
+        await mail.login(email_addr, password)
+        log.debug("Login successful")
+    except BaseException:
+        _close_transport(mail)
+        raise
+    return mail
+
+
+def _close_transport(mail):
+    transport = mail.protocol.transport
+    if transport is not None and not transport.is_closing():
+        transport.close()
+
+
+async def _close_connection(mail):
+    try:
+        await asyncio.wait_for(mail.logout(), 5)
+    except Exception as e:
+        log.debug(f"Logout failed: {e}")
+    finally:
+        # After a timed-out or cancelled command LOGOUT is stuck behind it; the shared loop never exits,
+        # so the socket would otherwise stay open
+        _close_transport(mail)
+
+
+class ImapConnectionPool:
+    """Logged-in IMAP connections per (host, port, email_addr), each lent to one user at a time
+
+    Only used from coroutines on the shared IMAP loop, so the idle lists need no locking.
+    """
+    max_idle_per_account = 4
+    max_idle_seconds = 25 * 60  # iCloud and Gmail drop connections idle for about 30 minutes
+
+    def __init__(self):
+        self._idle: Dict[tuple, list] = {}  # key -> [(connection, released_at)]
+        self._closing = set()  # The loop only holds weak references to tasks, so pending closes are kept here
+
+    @asynccontextmanager
+    async def acquire(self, host: str, port: int, use_ssl: bool, email_addr: str, password: str):
+        """Lend a logged-in connection, reusing an idle one when it is still usable
+
+        The connection goes back to the pool when the block exits normally; after an error or a
+        cancellation its state is unknown, so it is logged out instead and the next user reconnects.
+        """
+        key = (host, port, email_addr)
+        mail = await self._take_idle(key)
+        if mail is None:
+            mail = await _open_connection(host, port, use_ssl, email_addr, password)
+
+        try:
+            yield mail
+        except BaseException:
+            self._close_later(mail)
+            raise
+
+        idle = self._idle.setdefault(key, [])
+        if len(idle) < self.max_idle_per_account:
+            idle.append((mail, time.monotonic()))
+        else:
+            await _close_connection(mail)
+
+    async def _take_idle(self, key: tuple):
+        idle = self._idle.get(key)
+        while idle:
+            mail, released_at = idle.pop()
+            if mail.protocol.transport is None or mail.protocol.transport.is_closing():
+                log.debug(f"Pooled connection for {key[2]} was closed by the server")
+                continue
+            if time.monotonic() - released_at < self.max_idle_seconds:
+                log.debug(f"Reusing pooled connection for {key[2]}")
+                return mail
+            # Idle long enough that the server may have dropped it silently
+            try:
+                result, _ = await asyncio.wait_for(mail.noop(), 5)
+                if result == "OK":
+                    log.debug(f"Reusing pooled connection for {key[2]} after NOOP")
+                    return mail
+            except Exception as e:
+                log.debug(f"Pooled connection for {key[2]} is stale: {e}")
+            self._close_later(mail)
+        return None
+
+    def _close_later(self, mail):
+        """Close a discarded connection in the background without holding up its user"""
+        task = asyncio.ensure_future(_close_connection(mail))
+        self._closing.add(task)
+        task.add_done_callback(self._closing.discard)
+
+    async def close_all(self):
+        """Log out every idle connection and close the discarded ones still waiting on LOGOUT"""
+        idle, self._idle = self._idle, {}
+        closing = list(self._closing)
+        for task in closing:
+            task.cancel()  # Their LOGOUT may be stuck behind a dead command; the socket is closed either way
+        await asyncio.gather(*(_close_connection(mail) for connections in idle.values() for mail, _ in connections),
+                             *closing, return_exceptions=True)
+
+
+_imap_pool = ImapConnectionPool()
+
+
+def shutdown_imap_loop(timeout: float = 5):
+    """Log out pooled connections and stop the shared IMAP loop; call once workers have finished"""
+    global _imap_loop
+    with _imap_loop_lock:
+        loop, _imap_loop = _imap_loop, None
+    if loop is None:
+        return
+
+    async def shutdown():
+        await _imap_pool.close_all()
+        await loop.shutdown_asyncgens()
+        await loop.shutdown_default_executor()
+
+    try:
+        asyncio.run_coroutine_threadsafe(shutdown(), loop).result(timeout)
+    except Exception as e:
+        log.warning(f"IMAP loop did not shut down cleanly: {e}")
+    loop.call_soon_threadsafe(loop.stop)
+
+
+async def _list_folders(mail, email_addr: str) -> list:
+    """Return the account's LIST response lines, or an empty list if LIST failed"""
+    result, folders = await mail.list('""', '*')
+    if result != "OK":
+        log.warning(f"LIST failed for {email_addr}: {result}")
+        return []
+    return folders
+
+
+def _list_folder_name(line) -> Optional[str]:
+    """Extract the folder name from a LIST response line, or None if the line isn't a folder"""
+    match = _LIST_RE.search(line) if isinstance(line, bytes) else None
+    if not match:
+        return None
+    if match.group('quoted') is not None:
+        name = _QUOTED_ESCAPE_RE.sub(rb'\1', match.group('quoted'))
+    else:
+        name = match.group('unquoted')
+    return name.decode('utf-8', errors='replace') or None
+
+
+def _parse_list_lines(lines) -> List[str]:
+    """Folder names from LIST response lines, in server order, without the excluded folders"""
+    folder_names = []
+    for line in lines:
+        folder_name = _list_folder_name(line)
+        if folder_name is None:
+            log.debug(f"Could not parse folder line: {line!r}")
+        elif _EXCLUDED_FOLDER_RE.search(folder_name) is None:
+            folder_names.append(folder_name)
+    return folder_names
+
+
+def _parse_sexp(data: bytes) -> list:
+    """Parse an IMAP parenthesized list into nested lists of strings, with NIL as None"""
+    stack = [[]]
+    pos = 0
+    while True:
+        match = _SEXP_TOKEN_RE.match(data, pos)
+        if not match:
+            break
+        pos = match.end()
+        if match.group(1):
+            stack.append([])
+        elif match.group(2):
+            if len(stack) == 1:
+                raise ValueError("unbalanced parentheses")
+            closed = stack.pop()
+            stack[-1].append(closed)
+        elif match.group(3) is not None:
+            stack[-1].append(re.sub(rb'\\(.)', rb'\1', match.group(3)).decode('utf-8', errors='replace'))
+        else:
+            atom = match.group(4)
+            stack[-1].append(None if atom.upper() == b'NIL' else atom.decode('ascii', errors='replace'))
+
+    if len(stack) != 1 or data[pos:].strip():
+        raise ValueError("unparsable list (literal or unbalanced parentheses)")
+    return stack[0]
+
+
+def _find_text_parts(structure: list, section: str = '') -> Dict[str, tuple]:
+    """Locate the first inline text/plain and text/html parts of a BODYSTRUCTURE as (section, encoding, charset)"""
+    parts = {}
+    if structure and isinstance(structure[0], list):
+        # Multipart: the child parts come first, followed by the subtype and extension data
+        for index, child in enumerate(takewhile(lambda item: isinstance(item, list), structure), 1):
+            for subtype, found in _find_text_parts(child, f"{section}.{index}" if section else str(index)).items():
+                parts.setdefault(subtype, found)
+        return parts
+
+    if len(structure) < 7 or str(structure[0]).lower() != 'text':
+        return parts
+    subtype = str(structure[1]).lower()
+    disposition = structure[9] if len(structure) > 9 else None
+    if subtype not in ('plain', 'html') or (disposition and str(disposition[0]).lower() == 'attachment'):
+        return parts
+
+    params = structure[2] or []
+    charset = next((value for key, value in zip(params[::2], params[1::2]) if str(key).lower() == 'charset'), None)
+    # A single-part message's body is section 1
+    parts[subtype] = (section or '1', structure[5], charset)
+    return parts
+
+
+def _decode_part(data: bytes, encoding: str, charset: str, max_chars: int = None) -> str:
+    """Decode a body section fetched on its own, which may be cut off mid-encoding
+
+    With max_chars, only as much of the encoded data as could possibly produce that many
+    characters is decoded.
+    """
+    encoding = (encoding or '').lower()
+    # No charset we handle needs more than 4 bytes per character
+    limit = max_chars * 4 if max_chars else None
+    try:
+        if encoding == 'base64':
+            data = b''.join(data.split())
+            if limit:
+                data = data[:-(-limit // 3) * 4]
+            data = base64.b64decode(data[:len(data) // 4 * 4])
+        elif encoding == 'quoted-printable':
+            # Three bytes per escaped byte, plus the soft line breaks
+            data = quopri.decodestring(data[:limit * 4] if limit else data)
+    except (binascii.Error, ValueError) as e:
+        log.debug(f"Could not decode {encoding} body section: {e}")
+
+    if limit:
+        data = data[:limit]
+    try:
+        text = data.decode(charset or 'utf-8', errors='ignore')
+    except LookupError:
+        text = data.decode('utf-8', errors='ignore')
+    return text[:max_chars] if max_chars else text
+
+
+def _decode_header(value, default: str) -> str:
+    """Decode RFC 2047 encoded words in a header, skipping the work for plain headers"""
+    if value is None:
+        return default
+    value = str(value)
+    if '=?' not in value:
+        return value
+    try:
+        return str(make_header(decode_header(value)))
+    except (LookupError, UnicodeError, ValueError):
+        return value
+
+
+def _body_content(part) -> str:
+    """Decode a body part chosen by get_body, falling back to UTF-8 for unknown charsets"""
+    if part is None:
+        return ""
+    try:
+        return part.get_content()
+    except LookupError:
+        return (part.get_payload(decode=True) or b'').decode('utf-8', errors='ignore')
+
+
+def _parse_one_message(email_id: int, text_parts, sections: Dict[bytes, bytes]) -> Dict:
+    """Build the email dict from the sections fetched for one message by IMAPWorker._fetch_chunk"""
+    header_bytes = next((v for k, v in sections.items() if k.startswith(b'HEADER')), b'')
+
+    if text_parts is None:
+        # get_body picks the displayable parts without decoding attachments along the way
+        msg = email.message_from_bytes(header_bytes + sections.get(b'TEXT', b''), policy=email.policy.default)
+        body_text = _body_content(msg.get_body(preferencelist=('plain',)))
+        body_html = _body_content(msg.get_body(preferencelist=('html',)))
+    else:
+        # The text parts were fetched separately, so only the header block needs parsing
+        msg = _HEADER_PARSER.parsebytes(header_bytes)
+        body_text = body_html = ""
+        if 'plain' in text_parts:
+            section, encoding, charset = text_parts['plain']
+            body_text = _decode_part(sections.get(section.encode(), b''), encoding, charset, PREVIEW_CHARS)
+        if 'html' in text_parts:
+            section, encoding, charset = text_parts['html']
+            body_html = _decode_part(sections.get(section.encode(), b''), encoding, charset)
+
+    date_str = msg.get("Date", "Unknown")
+    try:
+        parsed_date = parsedate_to_datetime(date_str)
+        date_display = parsed_date.strftime("%Y-%m-%d %H:%M")
+        timestamp = int(parsed_date.timestamp())
+    except:
+        date_display = date_str
+        timestamp = 0
+
+    return {
+        "id": str(email_id),
+        "from": _decode_header(msg.get("From"), "Unknown"),
+        "subject": _decode_header(msg.get("Subject"), "No Subject"),
+        "date": date_display,
+        "body_text": body_text[:PREVIEW_CHARS] if body_text else body_html[:PREVIEW_CHARS],
+        "body_html": body_html,
+        "timestamp": timestamp
+    }
+
+
+def _parse_chunk(uids: List[int], fetched: Dict[int, tuple]) -> List[Dict]:
+    """Parse a fetched chunk in UID order, skipping messages that are missing or fail to parse"""
+    emails = []
+    for email_id in uids:
+        if email_id not in fetched:
+            log.warning(f"No message data returned for email ID {email_id}")
+            continue
+        try:
+            emails.append(_parse_one_message(email_id, *fetched[email_id]))
+            log.debug(f"Processed email ID {email_id}")
+        except Exception as e:
+            log.error(f"Error processing email ID {email_id}: {str(e)}")
+    return emails
+
 
 class UpdateChecker(QThread):
     update_available = pyqtSignal(str, str, str)  # latest_version, download_url, release_notes
     no_update = pyqtSignal()
     error = pyqtSignal(str)
 
-    def __init__(self, current_version: str, repo_url: str = "https://api.github.com/repos/anthropics/claude-code/releases/latest"):
+    check_interval = 6 * 3600  # Launches within this long of the last check reuse its result offline
+
+    def __init__(self, current_version: str, repo_url: str = "https://api.github.com/repos/anthropics/claude-code/releases/latest",
+                 cache_file: Path = None):
         super().__init__()
         self.current_version = current_version
         self.repo_url = repo_url
+        # ETag and release fields of the last 200 response, so unchanged releases come back as a bodyless 304
+        self.cache_file = Path(cache_file) if cache_file else Path.home() / ".mailtime" / "update_check.json"
 
     def run(self):
         """Check for updates from GitHub releases"""
         try:
             log.info(f"Checking for updates... Current version: {self.current_version}")
+            cached = self._load_update_cache()
+            if time.time() < cached.get('ratelimit_reset', 0):
+                # Requests made while rate limited only extend the penalty
+                log.debug("Update check skipped, GitHub rate limit still in effect")
+                self.no_update.emit()
+                return
+            if 'release' in cached and time.time() - cached.get('checked_at', 0) < self.check_interval:
+                log.info("Checked for updates recently, reusing that result")
+                self._emit_release(cached['release'])
+                return
 
             # Make request to GitHub API
             req = urllib.request.Request(self.repo_url)
             req.add_header('User-Agent', f'mailtime/{self.current_version}')
+            if cached.get('etag') and 'release' in cached:
+                req.add_header('If-None-Match', cached['etag'])
 
-            with urllib.request.urlopen(req, timeout=10) as response:
-                if response.status == 200:
-                    data = json.loads(response.read().decode('utf-8'))
-
-                    latest_version = data.get('tag_name', '').lstrip('v')
-                    download_url = data.get('html_url', '')
-                    release_notes = data.get('body', 'No release notes available.')
-
-                    if self._is_newer_version(latest_version, self.current_version):
-                        log.info(f"Update available: {latest_version}")
-                        self.update_available.emit(latest_version, download_url, release_notes)
-                    else:
-                        log.info("No updates available")
-                        self.no_update.emit()
-                else:
-                    log.warning(f"GitHub API returned status {response.status}")
-                    self.error.emit(f"Failed to check for updates (HTTP {response.status})")
+            ratelimit_reset = None
+            try:
+                with urllib.request.urlopen(req, timeout=10) as response:
+                    if response.status != 200:
+                        log.warning(f"GitHub API returned status {response.status}")
+                        self.error.emit(f"Failed to check for updates (HTTP {response.status})")
+                        return
+                    data = _json_loads(response.read())
+                    etag = response.headers.get('ETag')
+                    ratelimit_reset = self._ratelimit_reset(response.headers)
+                release = {key: data[key] for key in ('tag_name', 'html_url', 'body') if key in data}
+            except urllib.error.HTTPError as e:
+                ratelimit_reset = self._ratelimit_reset(e.headers) if e.code in (403, 429) else None
+                if ratelimit_reset:
+                    log.debug(f"GitHub API rate limited (HTTP {e.code}), not checking again for "
+                              f"{ratelimit_reset - time.time():.0f}s")
+                    self._save_update_cache({**cached, 'ratelimit_reset': ratelimit_reset})
+                    self.no_update.emit()
+                    return
+                # urlopen raises on 304; conditional requests don't count against GitHub's rate limit
+                if e.code != 304 or 'release' not in cached:
+                    raise
+                log.info("Latest release unchanged since last check")
+                etag = cached.get('etag')
+                release = cached['release']
+
+            cached = {'etag': etag, 'release': release, 'checked_at': time.time()}
+            if ratelimit_reset:
+                cached['ratelimit_reset'] = ratelimit_reset
+            self._save_update_cache(cached)
+            self._emit_release(release)
 
         except urllib.error.URLError as e:
             log.warning(f"Network error checking for updates: {e}")
@@ -60,17 +581,60 @@ class UpdateChecker(QThread):
             log.error(f"Unexpected error checking for updates: {e}")
             self.error.emit(f"Update check failed: {str(e)}")
 
-    def _is_newer_version(self, latest: str, current: str) -> bool:
-        """Compare version strings (basic semantic versioning)"""
-        try:
-            def version_tuple(v):
-                return tuple(map(int, v.split('.')))
+    def _emit_release(self, release: dict):
+        latest_version = release.get('tag_name', '').lstrip('v')
+        download_url = release.get('html_url', '')
+        release_notes = release.get('body', 'No release notes available.')
 
-            latest_tuple = version_tuple(latest)
-            current_tuple = version_tuple(current)
+        if self._is_newer_version(latest_version, self.current_version):
+            log.info(f"Update available: {latest_version}")
+            self.update_available.emit(latest_version, download_url, release_notes)
+        else:
+            log.info("No updates available")
+            self.no_update.emit()
+
+    @staticmethod
+    def _ratelimit_reset(headers) -> Optional[float]:
+        """Epoch time at which a rate-limited client may call the API again, or None if not limited"""
+        if headers is None:
+            return None
+        retry_after = headers.get('Retry-After')
+        if retry_after:
+            if retry_after.strip().isdigit():
+                return time.time() + int(retry_after)
+            try:
+                return parsedate_to_datetime(retry_after).timestamp()
+            except (TypeError, ValueError):
+                pass
+        # The quota reset only matters once it is used up; GitHub sends it on every response
+        if headers.get('X-RateLimit-Remaining') == '0':
+            try:
+                return float(headers.get('X-RateLimit-Reset'))
+            except (TypeError, ValueError):
+                pass
+        return None
 
-            return latest_tuple > current_tuple
-        except (ValueError, AttributeError):
+    def _load_update_cache(self) -> dict:
+        try:
+            cached = _json_loads(self.cache_file.read_bytes())
+            return cached if isinstance(cached, dict) else {}
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            log.debug(f"Ignoring unreadable update cache {self.cache_file}: {e}")
+            return {}
+
+    def _save_update_cache(self, cached: dict):
+        try:
+            _write_json_atomic(self.cache_file, cached)
+        except OSError as e:
+            log.debug(f"Could not write update cache {self.cache_file}: {e}")
+
+    def _is_newer_version(self, latest: str, current: str) -> bool:
+        """Compare version strings per PEP 440, so suffixes like 1.2.0rc1 or 1.2.0+build still compare"""
+        try:
+            return Version(latest) > Version(current)
+        except (InvalidVersion, TypeError):
             # If version parsing fails, assume no update needed
             return False
 
@@ -100,10 +664,7 @@ class IMAPDeleteWorker(QThread):
                 timeout = self.base_timeout + (attempt * 2)  # Progressive timeout: 5s, 7s, 9s
                 log.info(f"IMAP delete attempt {attempt + 1}/{self.max_retries} for email ID {self.email_id} (timeout: {timeout}s)")
 
-                loop = asyncio.new_event_loop()
-                asyncio.set_event_loop(loop)
-                success = loop.run_until_complete(asyncio.wait_for(self._delete_email(), timeout=timeout))
-                loop.close()
+                success = _run_on_imap_loop(self._delete_email(), timeout=timeout)
 
                 if success:
                     log.info(f"Email {self.email_id} deleted successfully on attempt {attempt + 1}")
@@ -117,16 +678,14 @@ class IMAPDeleteWorker(QThread):
                 last_error = f"Delete timeout after {timeout} seconds"
                 log.warning(f"IMAP delete attempt {attempt + 1} timed out for email {self.email_id}")
                 if attempt < self.max_retries - 1:
-                    import time
-                    time.sleep(1)
+                    time.sleep(_jittered_backoff(attempt))
                 continue
 
             except Exception as e:
                 last_error = str(e)
                 log.warning(f"IMAP delete attempt {attempt + 1} failed for email {self.email_id}: {str(e)}")
                 if attempt < self.max_retries - 1:
-                    import time
-                    time.sleep(1)
+                    time.sleep(_jittered_backoff(attempt))
                 continue
 
         # All retries failed
@@ -134,51 +693,36 @@ class IMAPDeleteWorker(QThread):
         self.error.emit(f"Delete failed after {self.max_retries} attempts. Last error: {last_error}")
 
     async def _delete_email(self):
-        log.debug(f"Connecting to {self.host}:{self.port} for deletion")
+        async with _imap_pool.acquire(self.host, self.port, self.use_ssl, self.email_addr, self.password) as mail:
+            await mail.select(f'"{self.folder}"')
+            log.debug(f"Folder '{self.folder}' selected for deletion")
 
-        # Create connection with shorter timeouts
-        if self.use_ssl:
-            mail = IMAP4_SSL(self.host, port=self.port)
-        else:
-            mail = IMAP4(self.host, port=self.port)
+            # Search for the email by UID with timeout
+            result, data = await mail.uid_search("UID", self.email_id)
+            if result != "OK" or not data or not data[0].split():
+                log.warning(f"Email with UID {self.email_id} not found in folder {self.folder}")
+                return False
 
-        # Set shorter timeout for server hello
-        await mail.wait_hello_from_server()
-        log.debug("Server hello received for deletion")
+            # Mark for deletion with timeout
+            await mail.uid('store', self.email_id, '+FLAGS (\\Deleted)')
+            log.debug(f"Email {self.email_id} marked for deletion")
 
-        # Set shorter timeout for login
-        await mail.login(self.email_addr, self.password)
-        log.debug("Login successful for deletion")
-
-        # Set shorter timeout for folder selection
-        await mail.select(f'"{self.folder}"')
-        log.debug(f"Folder '{self.folder}' selected for deletion")
-
-        # Search for the email by ID with timeout
-        search_result = await mail.search(f"UID {self.email_id}")
-        if not search_result or not search_result[1] or search_result[1] == [b'']:
-            log.warning(f"Email with UID {self.email_id} not found in folder {self.folder}")
-            await mail.logout()
-            return False
-
-        # Mark for deletion with timeout
-        await mail.store(self.email_id, '+FLAGS (\\Deleted)')
-        log.debug(f"Email {self.email_id} marked for deletion")
-
-        # Expunge to permanently delete with timeout
-        await mail.expunge()
-        log.debug(f"Expunge completed for email {self.email_id}")
-
-        await mail.logout()
-        return True
+            # Expunge to permanently delete with timeout
+            await mail.expunge()
+            log.debug(f"Expunge completed for email {self.email_id}")
+            return True
 
 
 class IMAPWorker(QThread):
     finished = pyqtSignal(list)
     error = pyqtSignal(str)
     connection_status = pyqtSignal(bool)
+    uid_marks_updated = pyqtSignal(dict)  # folder -> [uidvalidity, last_uid], emitted before finished
+    batch_ready = pyqtSignal(list)  # Emails of each parsed chunk of a single-folder sync, ahead of finished
+    uidvalidity_reset = pyqtSignal(str)  # Folder whose UIDs were renumbered, ahead of any of its emails
 
-    def __init__(self, email_addr: str, password: str, host: str, port: int, use_ssl: bool, folder: str):
+    def __init__(self, email_addr: str, password: str, host: str, port: int, use_ssl: bool, folder: str,
+                 uid_marks: Dict[str, List[int]] = None, known_uids: Dict[str, set] = None):
         super().__init__()
         self.email_addr = email_addr
         self.password = password
@@ -188,7 +732,12 @@ class IMAPWorker(QThread):
         self.folder = folder
         self.max_retries = 3
         self.base_timeout = 15  # More generous timeout - let server respond naturally
-        self._connection_cache = None  # Simple connection reuse
+        self.fetch_chunk_size = 10
+        self.max_body_bytes = 256 * 1024  # Cap on the HTML part, or on the whole body when falling back to MIME parsing
+        self.preview_bytes = 4096  # Only the start of the text/plain part is kept for the preview
+        self.uid_marks = dict(uid_marks or {})  # Marks of previous syncs; only UIDs above them are fetched
+        self.known_uids = known_uids or {}  # folder -> UIDs above its mark that are already stored locally
+        self.synced_uid_marks = {}
 
     def run(self):
         """Execute IMAP email fetching in separate thread with retry logic"""
@@ -198,14 +747,13 @@ class IMAPWorker(QThread):
             try:
                 timeout = self.base_timeout + (attempt * 5)  # Progressive timeout: 15s, 20s, 25s
                 log.info(f"IMAP sync attempt {attempt + 1}/{self.max_retries} for {self.email_addr} (timeout: {timeout}s)")
+                self.synced_uid_marks = {}
 
-                loop = asyncio.new_event_loop()
-                asyncio.set_event_loop(loop)
-                emails = loop.run_until_complete(asyncio.wait_for(self._fetch_emails(), timeout=timeout))
-                loop.close()
+                emails = _run_on_imap_loop(self._fetch_emails(), timeout=timeout)
 
                 log.info(f"Sync completed on attempt {attempt + 1}, found {len(emails)} emails")
                 self.connection_status.emit(True)
+                self.uid_marks_updated.emit(self.synced_uid_marks)
                 self.finished.emit(emails)
                 return
 
@@ -213,16 +761,14 @@ class IMAPWorker(QThread):
                 last_error = f"Connection timeout after {timeout} seconds"
                 log.warning(f"IMAP sync attempt {attempt + 1} timed out for {self.email_addr}")
                 if attempt < self.max_retries - 1:
-                    import time
-                    time.sleep(1)  # Brief pause between retries
+                    time.sleep(_jittered_backoff(attempt))
                 continue
 
             except Exception as e:
                 last_error = str(e)
                 log.warning(f"IMAP sync attempt {attempt + 1} failed for {self.email_addr}: {str(e)}")
                 if attempt < self.max_retries - 1:
-                    import time
-                    time.sleep(1)  # Brief pause between retries
+                    time.sleep(_jittered_backoff(attempt))
                 continue
 
         # All retries failed
@@ -230,177 +776,209 @@ class IMAPWorker(QThread):
         self.connection_status.emit(False)
         self.error.emit(f"Connection failed after {self.max_retries} attempts. Last error: {last_error}")
 
-    async def _fetch_emails(self):
-        log.debug(f"Connecting to {self.host}:{self.port}")
-
-        # Create connection with shorter internal timeouts
-        if self.use_ssl:
-            mail = IMAP4_SSL(self.host, port=self.port)
-        else:
-            mail = IMAP4(self.host, port=self.port)
-
-        # Wait for server hello - let natural IMAP handle timing if server is responding
-        await mail.wait_hello_from_server()
-        log.debug("Server hello received")
+    def _connection(self):
+        return _imap_pool.acquire(self.host, self.port, self.use_ssl, self.email_addr, self.password)
 
-        # Login - let natural IMAP handle timing if server is responding
-        await mail.login(self.email_addr, self.password)
-        log.debug("Login successful")
-
-        if self.folder == "ALL":
-            return await self._fetch_all_folders(mail)
-        else:
+    async def _fetch_emails(self):
+        async with self._connection() as mail:
             try:
-                select_result = await mail.select(f'"{self.folder}"')
-                if hasattr(select_result, 'result') and select_result.result != 'OK':
-                    raise Exception(f"Folder selection failed: {select_result}")
+                uidvalidity = await self._select_folder(mail, self.folder)
                 log.debug(f"Folder '{self.folder}' selected successfully")
-                return await self._fetch_folder_emails(mail)
+                return await self._fetch_folder_emails(mail, self.folder, uidvalidity, self.batch_ready.emit)
             except Exception as e:
                 log.error(f"Failed to select folder '{self.folder}': {str(e)}")
-                await mail.logout()
                 raise Exception(f"Cannot access folder '{self.folder}': {str(e)}")
 
-
-    async def _fetch_folder_emails(self, mail):
-        is_microsoft = any(domain in self.email_addr.lower() for domain in ["@hotmail.com", "@outlook.com", "@live.com"]) or "exchange" in self.host.lower()
+    async def _select_folder(self, mail, folder_name: str) -> int:
+        """Select a folder and return its UIDVALIDITY, or 0 if the server didn't report one"""
+        select_result = await mail.select(f'"{folder_name}"')
+        if hasattr(select_result, 'result') and select_result.result != 'OK':
+            raise Exception(f"Folder selection failed: {select_result}")
+        for line in select_result.lines:
+            match = _UIDVALIDITY_RE.search(line) if isinstance(line, bytes) else None
+            if match:
+                return int(match.group(1))
+        return 0
+
+    async def _fetch_folder_emails(self, mail, folder_name: str, uidvalidity: int, on_batch=None):
+        # Marks are only valid while the folder's UIDVALIDITY is unchanged
+        mark = self.uid_marks.get(folder_name)
+        if uidvalidity and mark and mark[0] != uidvalidity:
+            # Cached emails of this folder may share UIDs with different messages now
+            log.info(f"UIDVALIDITY of folder {folder_name} changed, refetching it")
+            self.uidvalidity_reset.emit(folder_name)
+        last_uid = mark[1] if uidvalidity and mark and mark[0] == uidvalidity else 0
+        uid_range = f"{last_uid + 1}:*"
 
         email_ids = []
-        if is_microsoft:
-            log.debug("Using FETCH method for Microsoft/Exchange")
-            result, data = await mail.fetch('1:*', '(UID)')
-            if result == "OK" and data:
-                for line in data:
-                    if isinstance(line, bytes) and b'FETCH (UID' in line:
-                        try:
-                            decoded = line.decode()
-                            seq_num = int(decoded.split()[0])
-                            email_ids.append(seq_num)
-                        except:
-                            continue
+        sorted_by_server = mail.has_capability('SORT')
+        if sorted_by_server:
+            log.debug("Using SORT method")
+            email_ids = await self._sort_uids(mail, uid_range)
         else:
             log.debug("Using SEARCH method")
-            result, data = await mail.search("ALL")
+            result, data = await mail.uid_search("UID", uid_range)
             if result == "OK" and data[0]:
                 email_ids = [int(eid) for eid in data[0].split()]
 
-        log.debug(f"Found {len(email_ids)} email IDs")
+        # "n:*" always matches the newest message, even when its UID is below n
+        new_ids = [uid for uid in email_ids if uid > last_uid]
+        # Without a valid mark the locally stored UIDs can't be trusted to be the same messages
+        known = self.known_uids.get(folder_name, set()) if last_uid else set()
+        unseen = [uid for uid in new_ids if uid not in known]
+        log.debug(f"Found {len(new_ids)} email UIDs above {last_uid}, {len(unseen)} not stored yet")
+
+        synced_mark = [uidvalidity, max(new_ids, default=last_uid)] if uidvalidity else None
 
-        if not email_ids:
-            log.warning("No emails found in folder")
+        if not unseen:
+            log.info(f"No new emails in folder {folder_name}")
+            if synced_mark:
+                self.synced_uid_marks[folder_name] = synced_mark
             return []
 
-        email_ids = sorted(email_ids, reverse=True)[-25:]  # Reduced from 50 to 25 for faster sync
+        if sorted_by_server:
+            email_ids = unseen[:25]  # Already newest first
+        else:
+            # Newest 25 by UID, newest first
+            email_ids = heapq.nlargest(25, unseen)
         log.info(f"Processing {len(email_ids)} emails")
         emails = []
 
-        for email_id in email_ids:
-            try:
-                result, data = await mail.fetch(str(email_id), "(RFC822)")
-                if result == "OK" and data and len(data) > 1:
-                    raw_bytes = data[1]
-                    msg = email.message_from_bytes(raw_bytes)
-
-                    date_str = msg.get("Date", "Unknown")
-                    try:
-                        parsed_date = parsedate_to_datetime(date_str)
-                        date_display = parsed_date.strftime("%Y-%m-%d %H:%M")
-                    except:
-                        date_display = date_str
-
-                    body_text = ""
-                    body_html = ""
-                    if msg.is_multipart():
-                        for part in msg.walk():
-                            if part.get_content_type() == "text/plain":
-                                try:
-                                    body_text += part.get_payload(decode=True).decode('utf-8', errors='ignore')
-                                except:
-                                    body_text += str(part.get_payload())
-                            elif part.get_content_type() == "text/html":
-                                try:
-                                    body_html += part.get_payload(decode=True).decode('utf-8', errors='ignore')
-                                except:
-                                    body_html += str(part.get_payload())
-                    else:
-                        if msg.get_content_type() == "text/plain":
-                            try:
-                                body_text = msg.get_payload(decode=True).decode('utf-8', errors='ignore')
-                            except:
-                                body_text = str(msg.get_payload())
-                        elif msg.get_content_type() == "text/html":
-                            try:
-                                body_html = msg.get_payload(decode=True).decode('utf-8', errors='ignore')
-                            except:
-                                body_html = str(msg.get_payload())
-
-                    emails.append({
-                        "id": str(email_id),
-                        "from": msg.get("From", "Unknown"),
-                        "subject": msg.get("Subject", "No Subject"),
-                        "date": date_display,
-                        "body_text": body_text[:500] if body_text else body_html[:500],
-                        "body_html": body_html
-                    })
-                    log.debug(f"Processed email ID {email_id}: {msg.get('Subject', 'No Subject')}")
-            except Exception as e:
-                log.error(f"Error processing email ID {email_id}: {str(e)}")
-                continue
+        # Fetch in chunks and start fetching the next chunk before parsing the current one. Parsing runs
+        # on a worker thread, so the event loop keeps sending commands and reading responses meanwhile.
+        loop = asyncio.get_running_loop()
+        chunks = [email_ids[i:i + self.fetch_chunk_size] for i in range(0, len(email_ids), self.fetch_chunk_size)]
+        pending = asyncio.ensure_future(self._fetch_chunk(mail, chunks[0]))
+        try:
+            for index, chunk in enumerate(chunks):
+                fetched = await pending
+                if index + 1 < len(chunks):
+                    pending = asyncio.ensure_future(self._fetch_chunk(mail, chunks[index + 1]))
+                batch = await loop.run_in_executor(None, _parse_chunk, chunk, fetched)
+                emails.extend(batch)
+                if on_batch and batch:
+                    on_batch(batch)
+        finally:
+            if not pending.done():
+                pending.cancel()
+
+        if synced_mark:
+            # Messages that came back empty or failed to parse stay above the mark so the next sync retries them.
+            # So do new ones beyond the newest 25, which later syncs fetch page by page, newest first; only
+            # a first sync leaves older history out, as the mark would otherwise never move past it.
+            stored = {int(email_data['id']) for email_data in emails}
+            missing = [uid for uid in (unseen if last_uid else email_ids) if uid not in stored]
+            if missing:
+                synced_mark[1] = min(missing) - 1
+            self.synced_uid_marks[folder_name] = synced_mark
         return emails
 
-    async def _fetch_all_folders(self, mail):
-        result, folders = await mail.list('""', '*')
-        all_emails = []
+    async def _sort_uids(self, mail, uid_range: str) -> List[int]:
+        """Return the UIDs in uid_range newest first using the server-side SORT extension (RFC 5256)"""
+        # aioimaplib's uid() only covers FETCH/STORE/COPY/MOVE/EXPUNGE, so issue UID SORT directly
+        protocol = mail.protocol
+        command = Command('SORT', protocol.new_tag(), '(REVERSE DATE)', 'UTF-8', 'UID', uid_range,
+                          prefix='UID', loop=protocol.loop)
+        result, data = await asyncio.wait_for(protocol.execute(command), mail.timeout)
+        if result != "OK":
+            raise Exception(f"SORT failed: {result}")
+        return [int(uid) for uid in data[0].split()] if data and data[0] else []
+
+    async def _fetch_chunk(self, mail, uids: List[int]) -> Dict[int, tuple]:
+        """Fetch the headers and text parts of a batch of messages as uid -> (text_parts, sections)
+
+        BODYSTRUCTURE is fetched first so only the text/plain and text/html sections are downloaded.
+        Messages whose structure can't be used get text_parts None and a capped TEXT section instead.
+        """
+        result, data = await mail.uid('fetch', _optimize_sequence(uids), '(UID BODYSTRUCTURE)')
+        if result != "OK":
+            raise Exception(f"FETCH failed: {result}")
+
+        text_parts = {}
+        for line in data:
+            match = _FETCH_LINE_RE.match(line) if isinstance(line, bytes) else None
+            if not match:
+                continue
+            try:
+                items = _parse_sexp(line[match.end() - 1:])[0]
+                fields = {str(key).upper(): value for key, value in zip(items[::2], items[1::2])}
+                text_parts[int(fields['UID'])] = _find_text_parts(fields['BODYSTRUCTURE'])
+            except (ValueError, KeyError, IndexError, TypeError) as e:
+                log.debug(f"Could not use BODYSTRUCTURE from {line[:100]}: {e}")
+
+        # Messages sharing the same section layout are fetched together
+        header_item = f"BODY.PEEK[HEADER.FIELDS ({_HEADER_FIELDS})]"
+        groups = {}
+        for uid in uids:
+            parts = text_parts.get(uid)
+            if parts is None:
+                items = [header_item, f"BODY.PEEK[TEXT]<0.{self.max_body_bytes}>"]
+            else:
+                items = [header_item]
+                if 'plain' in parts:
+                    items.append(f"BODY.PEEK[{parts['plain'][0]}]<0.{self.preview_bytes}>")
+                if 'html' in parts:
+                    items.append(f"BODY.PEEK[{parts['html'][0]}]<0.{self.max_body_bytes}>")
+            groups.setdefault(" ".join(items), []).append(uid)
+
+        fetched = {}
+        for items, group_uids in groups.items():
+            result, data = await mail.uid('fetch', _optimize_sequence(group_uids), f"(UID {items})")
+            if result != "OK":
+                raise Exception(f"FETCH failed: {result}")
+            for uid, sections in _split_fetch_response(data).items():
+                fetched[uid] = (text_parts.get(uid), sections)
+        return fetched
+
+
+class MultiFolderWorker(IMAPWorker):
+    """Fetch several folders concurrently on one event loop, one IMAP connection per folder"""
+    max_concurrent_folders = 4  # Stay well under the usual 10-15 connections per account
+
+    def __init__(self, email_addr: str, password: str, host: str, port: int, use_ssl: bool, folders: List[str],
+                 uid_marks: Dict[str, List[int]] = None, known_uids: Dict[str, set] = None):
+        super().__init__(email_addr, password, host, port, use_ssl, "ALL", uid_marks, known_uids)
+        self.folders = list(folders)
+        # Folders run in waves of max_concurrent_folders, so scale the per-attempt timeout with the wave count
+        waves = -(-len(self.folders) // self.max_concurrent_folders)
+        self.base_timeout *= max(1, waves)
 
-        if result == "OK" and folders:
-            folder_names = []
-            excluded_folders = ['Arquivo Morto', 'Archive', 'Outbox']
-
-            for folder_info in folders:
-                if isinstance(folder_info, bytes):
-                    folder_info = folder_info.decode()
-
-                log.debug(f"Processing folder line: {folder_info}")
-
-                try:
-                    folder_name = None
-                    if folder_info.count('"') >= 4:
-                        parts = folder_info.split('"')
-                        if len(parts) >= 4:
-                            folder_name = parts[3]
-                            log.debug(f"Quoted folder found: '{folder_name}'")
-                    elif '"/"' in folder_info:
-                        parts = folder_info.split('"/"')
-                        if len(parts) > 1:
-                            folder_name = parts[1].strip()
-                            log.debug(f"Unquoted folder found: '{folder_name}'")
-
-                    if (folder_name and folder_name != '/' and folder_name != '' and
-                        folder_name not in excluded_folders and
-                        not any(excluded in folder_name for excluded in excluded_folders)):
-                        folder_names.append(folder_name)
-
-                except Exception as e:
-                    log.debug(f"Error parsing folder info: {folder_info} - {e}")
-                    continue
-
-            log.info(f"Found {len(folder_names)} valid folders to sync: {folder_names}")
-
-            for folder_name in folder_names[:5]:
-                try:
-                    log.debug(f"Syncing folder: {folder_name}")
-                    await mail.select(f'"{folder_name}"')
-                    folder_emails = await self._fetch_folder_emails(mail)
-                    for email_data in folder_emails:
-                        email_data['folder'] = folder_name
-                    all_emails.extend(folder_emails)
-                except Exception as e:
-                    log.warning(f"Failed to sync folder {folder_name}: {e}")
-                    continue
-
-        all_emails = sorted(all_emails, key=lambda x: x.get('date', ''), reverse=True)[:50]
+    async def _fetch_emails(self):
+        all_emails, failed = await self._fetch_folders_concurrently(self.folders)
+        if self.folders and failed == len(self.folders):
+            raise Exception(f"All {failed} folders failed to sync")
         return all_emails
 
+    async def _fetch_folders_concurrently(self, folder_names: List[str]):
+        """Fetch folders in parallel, one connection each; returns (emails, failed folder count)"""
+        semaphore = asyncio.Semaphore(self.max_concurrent_folders)
+        results = await asyncio.gather(
+            *(self._fetch_one_folder(folder_name, semaphore) for folder_name in folder_names),
+            return_exceptions=True
+        )
+
+        all_emails = []
+        failed = 0
+        for folder_name, result in zip(folder_names, results):
+            if isinstance(result, Exception):
+                failed += 1
+                log.warning(f"Failed to sync folder {folder_name}: {result}")
+                continue
+            log.info(f"Loaded {len(result)} emails from folder: {folder_name}")
+            all_emails.extend(result)
+        return all_emails, failed
+
+    async def _fetch_one_folder(self, folder_name: str, semaphore: asyncio.Semaphore):
+        async with semaphore:
+            log.debug(f"Syncing folder: {folder_name}")
+            async with self._connection() as mail:
+                uidvalidity = await self._select_folder(mail, folder_name)
+                folder_emails = await self._fetch_folder_emails(mail, folder_name, uidvalidity)
+
+        for email_data in folder_emails:
+            email_data['folder'] = folder_name
+        return folder_emails
+
 
 class FileIOWorker(QThread):
     """Async file I/O worker to prevent UI blocking"""
@@ -423,6 +1001,8 @@ class FileIOWorker(QThread):
                 self._load_cache()
             elif self.operation_type == "save_cache":
                 self._save_cache()
+            elif self.operation_type == "delete_cached_email":
+                self._delete_cached_email()
             elif self.operation_type == "clear_cache":
                 self._clear_cache()
             elif self.operation_type == "load_config":
@@ -437,34 +1017,39 @@ class FileIOWorker(QThread):
     def _load_cache(self):
         """Load email cache from disk"""
         cache_file = Path(self.kwargs['cache_file_path'])
-        if cache_file.exists():
-            with open(cache_file, 'r', encoding='utf-8') as f:
-                cached_data = json.load(f)
-                self.cache_loaded.emit(cached_data)
-        else:
-            self.cache_loaded.emit({})
+        cache_data = {}
+        emails = email_cache.load_emails(cache_file)
+        if emails:
+            cache_data['emails'] = emails
+        uid_marks = email_cache.load_uid_marks(cache_file)
+        if uid_marks:
+            cache_data['uid_marks'] = uid_marks
+        self.cache_loaded.emit(cache_data)
 
     def _save_cache(self):
-        """Save email cache to disk"""
+        """Append new emails to the disk cache"""
         cache_file = Path(self.kwargs['cache_file_path'])
-        cache_data = self.kwargs['cache_data']
-        with open(cache_file, 'w', encoding='utf-8') as f:
-            json.dump(cache_data, f, indent=2)
+        account_email = self.kwargs.get('account_email', '')
+        emails = self.kwargs['emails']
+        uid_marks = self.kwargs.get('uid_marks')
+        email_cache.insert_emails(cache_file, account_email, emails, uid_marks, self.kwargs.get('reset_folders'))
+        self.cache_saved.emit(True)
+
+    def _delete_cached_email(self):
+        """Remove one email from the disk cache"""
+        email_cache.delete_email(self.kwargs['cache_file_path'], self.kwargs['folder'], self.kwargs['email_id'])
         self.cache_saved.emit(True)
 
     def _clear_cache(self):
-        cache_file = Path(self.kwargs['cache_file_path'])
-        if cache_file.exists():
-            cache_file.unlink()
+        email_cache.remove_cache(self.kwargs['cache_file_path'])
         self.cache_cleared.emit(True)
 
     def _load_config(self):
         """Load application configuration from disk"""
         config_file = Path(self.kwargs['config_file_path'])
         if config_file.exists():
-            with open(config_file, "r") as f:
-                config_data = json.load(f)
-                self.config_loaded.emit(config_data)
+            config_data = _json_loads(config_file.read_bytes())
+            self.config_loaded.emit(config_data)
         else:
             default_config = {"accounts": [], "default_imap": {}}
             self.config_loaded.emit(default_config)
@@ -473,21 +1058,32 @@ class FileIOWorker(QThread):
         """Save application configuration to disk"""
         config_file = Path(self.kwargs['config_file_path'])
         config_data = self.kwargs['config_data']
-        with open(config_file, "w") as f:
-            json.dump(config_data, f, indent=2)
+        _write_json_atomic(config_file, config_data)
         self.config_saved.emit(True)
 
     def _load_log(self):
         """Load log file content for display"""
         log_file = Path(self.kwargs['log_file_path'])
         if log_file.exists():
-            with open(log_file, 'r', encoding='utf-8') as f:
-                content = f.read()
-                lines = content.split('\n')
-                if len(lines) > 1000:
-                    content = '\n'.join(lines[-1000:])
-                    content = "... (showing last 1000 lines) ...\n\n" + content
-                self.log_loaded.emit(content)
+            max_lines = 1000
+            if log_file.stat().st_size < LOG_MMAP_THRESHOLD:
+                lines = log_file.read_bytes().splitlines(keepends=True)
+                truncated = len(lines) > max_lines
+                content = b''.join(lines[-max_lines:]).decode('utf-8', errors='replace')
+            else:
+                # Scan backwards for line boundaries in the mapped file; only the tail is ever copied
+                with open(log_file, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                    end = len(mm)
+                    start = end - 1 if mm[end - 1:end] == b'\n' else end
+                    for _ in range(max_lines):
+                        start = mm.rfind(b'\n', 0, start)
+                        if start < 0:
+                            break
+                    truncated = start >= 0
+                    content = mm[start + 1:end].decode('utf-8', errors='replace')
+            if truncated:
+                content = "... (showing last 1000 lines) ...\n\n" + content
+            self.log_loaded.emit(content)
         else:
             self.log_loaded.emit("Log file not found.\n\nThe log file is created when the application starts. Try running some operations and refresh.")
 
@@ -505,10 +1101,7 @@ class FolderWorker(QThread):
 
     def run(self):
         try:
-            loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(loop)
-            folders = loop.run_until_complete(self._fetch_folders())
-            loop.close()
+            folders = _run_on_imap_loop(self._fetch_folders())
             self.folders_fetched.emit(folders)
         except Exception as e:
             log.error(f"Error fetching folders: {str(e)}")
@@ -516,70 +1109,22 @@ class FolderWorker(QThread):
 
     async def _fetch_folders(self):
         try:
-            mail = IMAP4_SSL(self.host, port=self.port) if self.use_ssl else IMAP4(self.host, port=self.port)
-            await mail.wait_hello_from_server()
-            await mail.login(self.email_addr, self.password)
-
-            result, folders = await mail.list('""', '*')
-            folder_names = []
-
-            if result == "OK" and folders:
-                for folder_info in folders:
-                    if isinstance(folder_info, bytes):
-                        folder_info = folder_info.decode()
-
-                    log.debug(f"Processing folder line: {folder_info}")
-
-                    try:
-                        if folder_info.count('"') >= 4:
-                            parts = folder_info.split('"')
-                            if len(parts) >= 4:
-                                folder_name = parts[3]
-                                log.debug(f"Quoted folder found: '{folder_name}'")
-                                if folder_name and folder_name != '/':
-                                    folder_names.append(folder_name)
-                        elif '"/"' in folder_info:
-                            parts = folder_info.split('"/"')
-                            if len(parts) > 1:
-                                folder_name = parts[1].strip()
-                                log.debug(f"Unquoted folder found: '{folder_name}'")
-                                if folder_name and folder_name not in ['/', '""', '']:
-                                    folder_names.append(folder_name)
-                        else:
-                            log.debug(f"Could not parse folder line: {folder_info}")
-                    except Exception as e:
-                        log.debug(f"Error parsing folder info: {folder_info} - {e}")
-                        continue
-
-            await mail.logout()
-
+            async with _imap_pool.acquire(self.host, self.port, self.use_ssl, self.email_addr, self.password) as mail:
+                folders = await _list_folders(mail, self.email_addr)
+            folder_names = _parse_list_lines(folders)
             log.debug(f"Parsed folder names: {folder_names}")
 
-            folder_mappings = {
-                'INBOX': ['INBOX', 'Inbox'],
-                'SENT': ['SENT', 'Sent', 'Sent Items', 'Sent Mail'],
-                'DRAFTS': ['DRAFTS', 'Drafts', 'Draft'],
-                'TRASH': ['TRASH', 'Trash', 'Deleted', 'Deleted Items'],
-                'SPAM': ['SPAM', 'Spam', 'Junk', 'Junk E-mail', 'Bulk Mail'],
-                'NOTES': ['NOTES', 'Notes']
-            }
-
-            excluded_folders = ['Arquivo Morto', 'Archive', 'Outbox']
-
-            sorted_folders = []
-
-            for standard_name, variations in folder_mappings.items():
-                for folder in folder_names:
-                    if folder in variations and folder not in excluded_folders:
-                        if folder not in sorted_folders:
-                            sorted_folders.append(folder)
-                            break
-
+            # First folder matching each standard name, keyed by that name's position in _FOLDER_MAPPINGS
+            standard_folders = {}
+            other_folders = []
             for folder in folder_names:
-                if (folder not in sorted_folders and
-                    folder not in excluded_folders and
-                    not any(excluded in folder for excluded in excluded_folders)):
-                    sorted_folders.append(folder)
+                order = _FOLDER_ORDER.get(folder)
+                if order is not None and order not in standard_folders:
+                    standard_folders[order] = folder
+                else:
+                    other_folders.append(folder)
+
+            sorted_folders = [standard_folders[order] for order in sorted(standard_folders)] + other_folders
 
             return sorted_folders
 